@@ -7,8 +7,7 @@ def audit_pipeline():
 
     # 1. Load and Process
     processor = TennisPreprocessor()
-    processor.load_data('atp_tennis.csv')
-    df = processor.process()
+    df = processor.load_processed('atp_tennis.csv')
 
     # 2. Audit Elo Updates
     # Pick a specific player and check their rating progression
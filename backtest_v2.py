@@ -0,0 +1,33 @@
+import argparse
+
+from src.backtest import run_backtest
+from src.modeling import build_models
+from src.preprocessing import TennisPreprocessor
+
+# Configuration
+RANDOM_SEED = 42
+REPORT_DIR = 'reports/backtest_v2'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the V2 models, one fold per season.")
+    parser.add_argument('--first-test', default='2015-01-01', help="Start of the first test window")
+    parser.add_argument('--last-test', default='2024-01-01', help="Start of the last test window")
+    parser.add_argument('--freq', default='YS', help="Test window length (pandas offset alias)")
+    parser.add_argument('--window', type=int, default=None,
+                        help="Rolling training window in periods (default: expanding)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Worker processes")
+    parser.add_argument('--out-dir', default=REPORT_DIR)
+    args = parser.parse_args()
+
+    processor = TennisPreprocessor()
+    df = processor.load_processed('atp_tennis.csv')
+    splitter = processor.walk_forward_split(args.first_test, args.last_test, freq=args.freq, window=args.window)
+    print(splitter.describe().to_string(index=False))
+
+    metrics, _, report = run_backtest(df, splitter, build_models(RANDOM_SEED), out_dir=args.out_dir, n_jobs=args.n_jobs)
+    print(metrics.groupby('model')[['accuracy', 'log_loss', 'brier', 'roc_auc']].agg(['mean', 'std']).to_string())
+
+
+if __name__ == "__main__":
+    main()
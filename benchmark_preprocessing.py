@@ -0,0 +1,369 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import src.features
+from src.modeling import peak_rss_mb
+from src.preprocessing import TennisPreprocessor
+from src.synthetic import make_matches
+
+DATA_PATH = 'atp_tennis.csv'
+
+# Registry of benchmarks: {name: function(raw_df)}
+BENCHMARKS = {}
+
+# CSV backing the current run (the real file, or a temporary synthetic one)
+CSV_PATH = None
+
+
+def benchmark(name):
+    """Register a benchmark function under a name usable from the command line."""
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn once and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def load_matches(path=DATA_PATH, n_synthetic=60000):
+    """Load the real dataset if present, otherwise a synthetic one of similar size."""
+    if os.path.exists(path):
+        return TennisPreprocessor().load_data(path)
+    print(f"{path} not found, using {n_synthetic} synthetic matches.")
+    return make_matches(n_matches=n_synthetic, n_players=1500)
+
+
+def cleaned_processor(raw_df, **kwargs):
+    processor = TennisPreprocessor(**kwargs)
+    processor.raw_df = raw_df
+    processor.clean_data()
+    return processor
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def traced(fn, *args, **kwargs):
+    """Run fn once and return (result, seconds, peak MB allocated during the call)."""
+    tracemalloc.start()
+    try:
+        result, seconds = timed(fn, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+@benchmark('load')
+def bench_load(raw_df):
+    """Plain read_csv path vs the typed, schema-driven loader."""
+    plain = TennisPreprocessor()
+    df_plain, t_plain = timed(plain.load_data, CSV_PATH)
+    typed = TennisPreprocessor()
+    df_typed, t_typed = timed(typed.load_data, CSV_PATH, typed=True)
+    pruned = TennisPreprocessor()
+    cols = ['Date', 'Surface', 'Player_1', 'Player_2', 'Winner', 'Odd_1', 'Odd_2']
+    df_pruned, t_pruned = timed(pruned.load_data, CSV_PATH, typed=True, usecols=cols)
+
+    print(f"read_csv: {t_plain:.3f}s, {frame_memory_mb(df_plain):.1f} MB")
+    print(f"typed:    {t_typed:.3f}s, {frame_memory_mb(df_typed):.1f} MB")
+    print(f"typed + usecols ({len(cols)} cols): {t_pruned:.3f}s, {frame_memory_mb(df_pruned):.1f} MB")
+
+
+@benchmark('cache')
+def bench_cache(raw_df):
+    """load_data + clean_data vs the content-hashed Parquet cache."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        processor = TennisPreprocessor()
+        _, t_miss = timed(processor.load_clean_data, CSV_PATH, cache_dir=cache_dir)
+        processor = TennisPreprocessor()
+        _, t_hit = timed(processor.load_clean_data, CSV_PATH, cache_dir=cache_dir)
+    print(f"miss (parse + clean + write): {t_miss:.3f}s | hit: {t_hit * 1000:.1f}ms")
+
+
+@benchmark('features')
+def bench_features(raw_df):
+    """Full process() vs reusing the materialized feature table."""
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = TennisPreprocessor()
+        _, t_build = timed(processor.load_processed, CSV_PATH, artifact_dir=tmp, cache_dir=tmp)
+        processor = TennisPreprocessor()
+        _, t_reuse = timed(processor.load_processed, CSV_PATH, artifact_dir=tmp, cache_dir=tmp)
+    print(f"build (load + process + write): {t_build:.3f}s | reuse: {t_reuse:.3f}s")
+
+
+def merge_back(df, long_df, feats):
+    """The former write-back: two hash joins on Match_ID."""
+    df = df.copy()
+    for side, is_p1 in (('p1', True), ('p2', False)):
+        side_feats = long_df[long_df['Is_P1'] == is_p1][['Match_ID'] + feats].copy()
+        side_feats.columns = ['Match_ID'] + [f'{side}_{f}' for f in feats]
+        df = df.merge(side_feats, left_index=True, right_on='Match_ID', how='left').drop(columns='Match_ID')
+    return df.reset_index(drop=True)
+
+
+@benchmark('scatter')
+def bench_scatter(raw_df):
+    """Writing long-format features back: Match_ID merges vs positional scatter."""
+    processor = cleaned_processor(raw_df)
+    df = processor.df.reset_index(drop=True)
+    long_df = processor._long_form(df)
+    feats = ['win_rate_career', 'win_rate_last_10', 'win_rate_surface']
+
+    merged, t_merge, mb_merge = traced(merge_back, df, long_df, feats)
+    scattered, t_scatter, mb_scatter = traced(TennisPreprocessor._scatter_long, df.copy(), long_df, feats)
+    print(f"merge:   {t_merge:.3f}s, peak {mb_merge:.1f} MB")
+    print(f"scatter: {t_scatter:.3f}s, peak {mb_scatter:.1f} MB | identical: {merged.equals(scattered[merged.columns])}")
+
+
+@benchmark('windows')
+def bench_windows(raw_df):
+    """add_features runtime as overall/surface form windows are added."""
+    for windows in [(), (10,), (5, 10, 20), (3, 5, 10, 20, 50)]:
+        processor = cleaned_processor(raw_df, form_windows=windows)
+        _, t = timed(processor.add_features)
+        print(f"windows {windows or '(none)'}: {t:.3f}s")
+
+
+@benchmark('decay')
+def bench_decay(raw_df):
+    """Time-decayed form features: runtime per number of half-lives."""
+    for half_lives in [(30,), (30, 90, 365)]:
+        processor = cleaned_processor(raw_df, decay_half_lives=half_lives)
+        processor.add_elo_features()
+        _, t = timed(processor.add_decay_features)
+        print(f"half-lives {half_lives}: {t:.3f}s")
+
+
+@benchmark('h2h')
+def bench_h2h(raw_df):
+    """Head-to-head features in one pass vs filtering the frame per row (sampled)."""
+    processor = cleaned_processor(raw_df)
+    _, t_index = timed(processor.add_h2h_features)
+
+    df, n_sample = processor.df, 200
+    start = time.perf_counter()
+    for i in range(len(df) - n_sample, len(df)):
+        a, b = df['Player_1'].iat[i], df['Player_2'].iat[i]
+        before = df.iloc[:i]
+        len(before[((before['Player_1'] == a) & (before['Player_2'] == b)) |
+                   ((before['Player_1'] == b) & (before['Player_2'] == a))])
+    t_filter = (time.perf_counter() - start) / n_sample * len(df)
+    print(f"pair index: {t_index:.3f}s | per-row filtering (estimated): {t_filter:.1f}s")
+
+
+@benchmark('schedule')
+def bench_schedule(raw_df):
+    """Schedule/fatigue features via searchsorted vs per-row date filters (sampled)."""
+    processor = cleaned_processor(raw_df)
+    _, t_search = timed(processor.add_schedule_features)
+
+    df, n_sample = processor.df, 200
+    start = time.perf_counter()
+    for i in range(len(df) - n_sample, len(df)):
+        player, date = df['Player_1'].iat[i], df['Date'].iat[i]
+        before = df.iloc[:i]
+        played = before[(before['Player_1'] == player) | (before['Player_2'] == player)]
+        [(played['Date'] > date - pd.Timedelta(days=w)).sum() for w in (7, 14, 30)]
+    t_filter = (time.perf_counter() - start) / n_sample * len(df)
+    print(f"searchsorted: {t_search:.3f}s | per-row filtering (estimated): {t_filter:.1f}s")
+
+
+@benchmark('incremental')
+def bench_incremental(raw_df, n_new=300):
+    """Batch add_features on the full history vs incremental features for the last day's rows."""
+    full = cleaned_processor(raw_df)
+    _, t_batch = timed(full.add_features)
+
+    history = cleaned_processor(raw_df.iloc[:-n_new])
+    history.add_features()
+    new = cleaned_processor(raw_df.iloc[-n_new:].reset_index(drop=True))
+    new.form_state = history.form_state
+    _, t_incr = timed(new.add_features, incremental=True)
+
+    identical = np.array_equal(new.df['p1_win_rate_last_10'].to_numpy(), full.df['p1_win_rate_last_10'].to_numpy()[-n_new:])
+    print(f"batch ({len(raw_df)} rows): {t_batch:.3f}s | incremental ({n_new} rows): {t_incr * 1000:.1f}ms "
+          f"| identical: {identical}")
+
+
+@benchmark('scores')
+def bench_scores(raw_df):
+    """Vectorized score parsing: pyarrow kernels vs the pandas extractall fallback."""
+    scores = raw_df['Score']
+    fast, t_arrow = timed(src.features.parse_score_column, scores)
+    has_pyarrow = src.features.HAS_PYARROW
+    src.features.HAS_PYARROW = False
+    try:
+        fallback, t_pandas = timed(src.features.parse_score_column, scores)
+    finally:
+        src.features.HAS_PYARROW = has_pyarrow
+    print(f"pyarrow: {t_arrow * 1000:.1f}ms | pandas: {t_pandas * 1000:.1f}ms "
+          f"| identical: {fast.equals(fallback)}")
+
+
+@benchmark('stream')
+def bench_stream(raw_df, chunk_size=10000):
+    """Full in-memory process() vs chunked process_stream(): time and traced peak memory."""
+    full = TennisPreprocessor()
+    full.load_data(CSV_PATH)
+    _, t_full, mb_full = traced(full.process)
+    with tempfile.TemporaryDirectory() as tmp:
+        streamed = TennisPreprocessor()
+        _, t_stream, mb_stream = traced(streamed.process_stream, CSV_PATH, os.path.join(tmp, 'features.parquet'),
+                                        chunk_size=chunk_size)
+    print(f"process():        {t_full:.3f}s, peak {mb_full:.1f} MB")
+    print(f"process_stream(): {t_stream:.3f}s, peak {mb_stream:.1f} MB (chunks of {chunk_size})")
+
+
+def _process_peak_rss(path, lean):
+    """
+    Worker: load + process() in a fresh process; returns (seconds, baseline MB,
+    peak RSS MB, frame MB). Both RSS figures are this worker's own VmHWM: the
+    baseline right after the imports, the peak after process().
+    """
+    baseline = peak_rss_mb()
+    processor = TennisPreprocessor(lean=lean)
+    processor.load_data(path)
+    _, seconds = timed(processor.process)
+    peak = peak_rss_mb()
+    return seconds, baseline, peak, frame_memory_mb(processor.df)
+
+
+@benchmark('lean')
+def bench_lean(raw_df):
+    """Default vs lean dtypes: process() time, peak RSS (fresh process each) and final frame size."""
+    spawn = multiprocessing.get_context('spawn')
+    for lean in (False, True):
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            seconds, baseline, peak, frame_mb = pool.submit(_process_peak_rss, CSV_PATH, lean).result()
+        print(f"lean={lean}: {seconds:.3f}s | peak RSS {peak:.0f} MB (imports {baseline:.0f} MB, "
+              f"+{peak - baseline:.0f} MB for load + process) | frame {frame_mb:.1f} MB")
+
+
+@benchmark('elo')
+def bench_elo(raw_df):
+    """iterrows() EloSystem loop vs the array-backed engine."""
+    reference = cleaned_processor(raw_df)
+    _, t_loop = timed(reference.add_elo_features, engine='iterrows')
+
+    fast = cleaned_processor(raw_df)
+    _, t_array = timed(fast.add_elo_features, engine='array')
+
+    cols = ['elo_p1', 'elo_p2', 'elo_prob_p1', 'elo_prob_p2', 'elo_surf_p1', 'elo_surf_p2']
+    identical = all(np.array_equal(reference.df[c].to_numpy(), fast.df[c].to_numpy()) for c in cols)
+
+    print(f"iterrows: {t_loop:.3f}s | array: {t_array:.3f}s | speedup: {t_loop / t_array:.1f}x")
+    print(f"Bit-for-bit identical: {identical}")
+
+
+@benchmark('parallel')
+def bench_parallel(raw_df):
+    """Sequential array engine vs surface tracks in worker processes."""
+    sequential = cleaned_processor(raw_df)
+    _, t_seq = timed(sequential.add_elo_features)
+
+    n_jobs = os.cpu_count() or 1
+    parallel = cleaned_processor(raw_df)
+    _, t_par = timed(parallel.add_elo_features, n_jobs=max(n_jobs, 2))
+
+    identical = np.array_equal(sequential.df['elo_surf_p1'].to_numpy(), parallel.df['elo_surf_p1'].to_numpy())
+    print(f"sequential: {t_seq:.3f}s | parallel ({n_jobs} cores): {t_par:.3f}s | identical: {identical}")
+
+
+@benchmark('period')
+def bench_period(raw_df):
+    """Sequential array engine vs rating-period batch updates."""
+    processor = cleaned_processor(raw_df)
+    _, t_seq = timed(processor.add_elo_features)
+    print(f"sequential: {t_seq:.3f}s")
+    for period in ['D', 'W', 'M']:
+        processor = cleaned_processor(raw_df)
+        _, t = timed(processor.add_elo_features, engine='period', period=period)
+        print(f"period={period}: {t:.3f}s")
+
+
+@benchmark('sweep')
+def bench_sweep(raw_df):
+    """A 50-configuration Elo grid in one replay vs one single-config replay."""
+    processor = cleaned_processor(raw_df)
+    _, t_single = timed(processor.add_elo_features, engine='array')
+
+    processor = cleaned_processor(raw_df)
+    results, t_sweep = timed(
+        processor.sweep_elo_params,
+        k_factors=[10, 16, 20, 24, 32, 40, 48, 64, 80, 100],
+        surface_weights=[0.0, 0.25, 0.5, 0.75, 1.0],
+    )
+    print(results.head(5).to_string(index=False))
+    print(f"single replay: {t_single:.3f}s | 50-config sweep: {t_sweep:.3f}s "
+          f"| sequential estimate: {50 * t_single:.1f}s")
+
+
+@benchmark('tracks')
+def bench_tracks(raw_df):
+    """Multi-track engine: runtime as tracks are added."""
+    tracks = [('elo', None), ('elo_surf', 'Surface'), ('elo_court', 'Court'), ('elo_series', 'Series')]
+    for n_tracks in range(1, len(tracks) + 1):
+        processor = cleaned_processor(raw_df)
+        _, t = timed(processor.add_elo_features, engine='multitrack', tracks=tracks[:n_tracks])
+        print(f"{n_tracks} track(s): {t:.3f}s")
+
+
+
+@benchmark('splits')
+def bench_splits(raw_df):
+    """Yearly folds: time_based_split() copies per fold vs walk-forward index arrays."""
+    processor = cleaned_processor(raw_df)
+    years = sorted(processor.df['Date'].dt.year.unique())[1:]
+    first, last = f'{years[0]}-01-01', f'{years[-1]}-01-01'
+
+    def copies():
+        return [processor.time_based_split(f'{year}-01-01') for year in years]
+
+    def walk_forward():
+        return [(processor.df.iloc[tr], processor.df.iloc[te]) for tr, te in processor.walk_forward_split(first, last)]
+
+    def indices():
+        return list(processor.walk_forward_split(first, last))
+
+    for name, fn in [('time_based_split', copies), ('walk-forward + iloc', walk_forward), ('walk-forward indices', indices)]:
+        _, t, peak = traced(fn)
+        print(f"{name}: {t:.3f}s, peak {peak:.1f}MB over {len(years)} folds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing stages.")
+    parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all). Available: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--data', default=DATA_PATH)
+    args = parser.parse_args()
+
+    global CSV_PATH
+    raw_df = load_matches(args.data)
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.exists(args.data):
+            CSV_PATH = args.data
+        else:
+            CSV_PATH = os.path.join(tmp, 'matches.csv')
+            raw_df.to_csv(CSV_PATH, index=False)
+
+        for name in args.names or list(BENCHMARKS):
+            print(f"\n=== {name} ===")
+            BENCHMARKS[name](raw_df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, brier_score_loss, log_loss, roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from src.modeling import CATEGORICAL_COLS, NUMERICAL_COLS, build_preprocessor
+
+METRICS = ['accuracy', 'log_loss', 'brier', 'roc_auc']
+
+
+def design_matrix(df, numerical_cols, categorical_cols):
+    """
+    All model inputs as one float64 array: numerical columns as they are,
+    categorical columns as their integer codes (-1 for missing), which the
+    one-hot step of build_preprocessor() encodes like the original labels.
+    """
+    X = np.empty((len(df), len(numerical_cols) + len(categorical_cols)))
+    for j, col in enumerate(numerical_cols):
+        X[:, j] = df[col].to_numpy(dtype=float, na_value=np.nan)
+    for j, col in enumerate(categorical_cols, start=len(numerical_cols)):
+        X[:, j] = pd.factorize(df[col], sort=True)[0]
+    return X
+
+
+def _fit_fold(fold, name, model, design_path, target_path, train_idx, test_idx, n_numerical):
+    """Worker: fit one pipeline on one fold of the memory-mapped design matrix."""
+    X = np.load(design_path, mmap_mode='r')
+    y = np.load(target_path, mmap_mode='r')
+    n_cols = X.shape[1]
+
+    clf = Pipeline(steps=[
+        ('preprocessor', build_preprocessor(list(range(n_numerical)), list(range(n_numerical, n_cols)))),
+        ('classifier', clone(model))
+    ])
+    start = time.perf_counter()
+    clf.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    X_test = X[test_idx]
+    return fold, name, fit_seconds, clf.predict(X_test), clf.predict_proba(X_test)[:, 1]
+
+
+def _fold_metrics(y, pred, proba):
+    return {
+        'accuracy': accuracy_score(y, pred),
+        'log_loss': log_loss(y, proba, labels=[0, 1]),
+        'brier': brier_score_loss(y, proba),
+        'roc_auc': roc_auc_score(y, proba) if len(np.unique(y)) == 2 else np.nan,
+    }
+
+
+def run_backtest(df, splitter, models, numerical_cols=NUMERICAL_COLS, categorical_cols=CATEGORICAL_COLS,
+                 target='y', out_dir=None, n_jobs=-1):
+    """
+    Walk-forward backtest: fit every model on every fold of splitter (see
+    src.splits.WalkForwardSplit) and score it on the fold's test window.
+
+    The design matrix and target are written once to .npy files and opened
+    memory-mapped by the worker processes, so all (fold, model) fits run in
+    parallel on shared pages instead of pickled copies of the frame. Each fit
+    refits the preprocessor on its own training window (no leakage across
+    folds). joblib caps the threads of each worker at cores / n_jobs.
+
+    Returns (metrics, predictions, report): one row per fold and model, one
+    row per test match and model, and a summary dict. With out_dir, they are
+    also written to metrics.csv, predictions.csv and report.json.
+    """
+    folds = [(fold, train_idx, test_idx) for fold, (train_idx, test_idx) in enumerate(splitter.split())
+             if len(train_idx) and len(test_idx)]
+    y = df[target].to_numpy(dtype=np.int8)
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        design_path = os.path.join(tmp, 'design.npy')
+        target_path = os.path.join(tmp, 'target.npy')
+        np.save(design_path, design_matrix(df, numerical_cols, categorical_cols))
+        np.save(target_path, y)
+
+        print(f"Backtest: {len(folds)} folds x {len(models)} models on {n_jobs} worker(s)...")
+        results = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_fold)(fold, name, model, design_path, target_path, train_idx, test_idx, len(numerical_cols))
+            for fold, train_idx, test_idx in folds
+            for name, model in models.items()
+        )
+    wall_seconds = time.perf_counter() - start
+
+    fold_info = splitter.describe().set_index('fold')
+    test_rows = {fold: test_idx for fold, _, test_idx in folds}
+    dates = df['Date'].to_numpy()
+
+    metric_rows, predictions = [], []
+    for fold, name, fit_seconds, pred, proba in results:
+        rows = test_rows[fold]
+        info = fold_info.loc[fold]
+        metric_rows.append({
+            'fold': fold,
+            'model': name,
+            'test_start': info['test_start'],
+            'test_end': info['test_end'],
+            'n_train': info['n_train'],
+            'n_test': info['n_test'],
+            **_fold_metrics(y[rows], pred, proba),
+            'fit_seconds': fit_seconds,
+        })
+        predictions.append(pd.DataFrame({
+            'fold': fold, 'model': name, 'row': rows, 'Date': dates[rows],
+            'y': y[rows], 'pred': pred, 'proba': proba,
+        }))
+
+    metrics = pd.DataFrame(metric_rows)
+    predictions = pd.concat(predictions, ignore_index=True) if predictions else pd.DataFrame()
+    summary = metrics.groupby('model')[METRICS].agg(['mean', 'std']) if len(metrics) else pd.DataFrame()
+
+    report = {
+        'n_folds': len(folds),
+        'models': list(models),
+        'wall_seconds': wall_seconds,
+        'total_fit_seconds': float(metrics['fit_seconds'].sum()) if len(metrics) else 0.0,
+        'summary': {
+            model: {f'{metric}_{stat}': float(value) for (metric, stat), value in row.items()}
+            for model, row in summary.iterrows()
+        },
+        'folds': json.loads(metrics.to_json(orient='records', date_format='iso')),
+    }
+    print(f"Backtest finished in {wall_seconds:.1f}s (sum of fit times {report['total_fit_seconds']:.1f}s)")
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        metrics.to_csv(os.path.join(out_dir, 'metrics.csv'), index=False)
+        predictions.to_csv(os.path.join(out_dir, 'predictions.csv'), index=False)
+        with open(os.path.join(out_dir, 'report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved backtest report to {out_dir}")
+
+    return metrics, predictions, report
@@ -2,34 +2,40 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 from sklearn.model_selection import train_test_split
-from src.dashboard.config import DATA_PATH, RANDOM_SEED, TEST_SIZE
+from src.dashboard.config import CACHE_DIR, DATA_PATH, FEATURES_DIR, RANDOM_SEED, TEST_SIZE
+from src.preprocessing import TennisPreprocessor
 
 @st.cache_data
 def load_data():
-    """Load and preprocess tennis dataset."""
+    """Load the cleaned tennis dataset through the Parquet cache (no CSV re-parse once cached)."""
     if not DATA_PATH.exists():
         st.error(f"Data file not found at {DATA_PATH}")
         return pd.DataFrame()
 
-    df = pd.read_csv(DATA_PATH)
+    df = TennisPreprocessor().load_clean_data(str(DATA_PATH), cache_dir=str(CACHE_DIR))
 
-    # Date conversion
-    if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        # Filter as per training script
-        df = df[df['Date'] > '2010-01-01']
+    # Filter as per training script
+    return df[df['Date'] > '2010-01-01']
 
-    return df
+@st.cache_resource
+def get_processor():
+    """Run the V2 pipeline once and share the processor (frame + Elo state) across pages."""
+    processor = TennisPreprocessor()
+    processor.load_processed(str(DATA_PATH), artifact_dir=str(FEATURES_DIR), cache_dir=str(CACHE_DIR))
+    return processor
 
 @st.cache_data
 def get_processed_data():
     """Load and preprocess data to include V2 features (Elo, Form, etc.)."""
-    processor = TennisPreprocessor()
-    processor.load_data(str(DATA_PATH))
-    df = processor.process()
-    return df
+    return get_processor().df
 
-from src.preprocessing import TennisPreprocessor
+def get_rating_history():
+    """Point-in-time Elo index (RatingHistory) recorded during the replay."""
+    return get_processor().rating_history
+
+def get_h2h_index():
+    """Pair-keyed head-to-head index (HeadToHead) built during the replay; lookup(p1, p2, surface)."""
+    return get_processor().h2h
 
 @st.cache_data
 def get_train_test_data():
@@ -38,11 +44,9 @@ def get_train_test_data():
     Returns:
         X_train, X_test, y_train, y_test, df_test (original dataframe rows for test set)
     """
-    # Use the V2 Preprocessor
-    processor = TennisPreprocessor()
-    # We need to pass the absolute path to load_data
-    processor.load_data(str(DATA_PATH))
-    df = processor.process()
+    # Use the V2 Preprocessor (shared with the other pages)
+    processor = get_processor()
+    df = processor.df
 
     if df is None or df.empty:
         return None, None, None, None, None
@@ -5,6 +5,8 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_PATH = BASE_DIR / 'atp_tennis.csv'
 MODELS_DIR = BASE_DIR / 'models'
+CACHE_DIR = BASE_DIR / 'data' / 'cache'
+FEATURES_DIR = BASE_DIR / 'data' / 'features'
 
 # Constants
 RANDOM_SEED = 42
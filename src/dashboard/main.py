@@ -1,7 +1,7 @@
 import streamlit as st
 from src.dashboard.config import PAGE_TITLE, PAGE_ICON, LAYOUT
-from src.dashboard.utils.data_manager import load_data
-from src.dashboard.utils.model_manager import discover_models
+from src.dashboard.components.data_manager import load_data
+from src.dashboard.components.model_manager import discover_models
 from src.dashboard.views.home import render_home
 from src.dashboard.views.playground import render_playground
 from src.dashboard.views.comparison import render_comparison
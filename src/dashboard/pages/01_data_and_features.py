@@ -1,8 +1,7 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 from src.dashboard.components.navigation import sidebar_navigation
-from src.dashboard.components.data_manager import get_processed_data
+from src.dashboard.components.data_manager import get_processed_data, get_rating_history
 
 st.set_page_config(page_title="Data & Features", page_icon="📊", layout="wide")
 sidebar_navigation()
@@ -74,25 +73,19 @@ with tab1:
     default_idx = players.index('Federer R.') if 'Federer R.' in players else 0
     selected_player = st.selectbox("Select Player", players, index=default_idx)
 
-    # Filter matches for this player
-    p_matches = df[(df['Player_1'] == selected_player) | (df['Player_2'] == selected_player)].sort_values('Date')
+    # Rating trajectory from the point-in-time index (no scan of the match table)
+    rating_history = get_rating_history()
 
-    if not p_matches.empty:
-        # Extract Elo history
-        dates = []
-        elos = []
+    if rating_history is None:
+        st.info("No rating history available: re-run the feature pipeline to record it.")
+    else:
+        hist_df = rating_history.player_history(selected_player)
 
-        for _, row in p_matches.iterrows():
-            dates.append(row['Date'])
-            if row['Player_1'] == selected_player:
-                elos.append(row['elo_p1'])
-            else:
-                elos.append(row['elo_p2'])
-
-        hist_df = pd.DataFrame({'Date': dates, 'Elo': elos})
-
-        fig = px.line(hist_df, x='Date', y='Elo', title=f"Elo Rating History: {selected_player}")
-        st.plotly_chart(fig, use_container_width=True)
+        if not hist_df.empty:
+            # Post-match ratings: each point already includes that match
+            fig = px.line(hist_df, x='Date', y='Elo', labels={'Elo': 'Elo after match'},
+                          title=f"Elo Rating History (after each match): {selected_player}")
+            st.plotly_chart(fig, use_container_width=True)
 
 with tab2:
     st.subheader("Momentum & Form")
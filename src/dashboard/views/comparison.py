@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from src.dashboard.utils.data_manager import get_train_test_data
-from src.dashboard.utils.model_manager import load_model
+from src.dashboard.components.data_manager import get_train_test_data
+from src.dashboard.components.model_manager import load_model
 from src.dashboard.utils.metrics import compute_metrics
-from src.dashboard.utils.plotting import plot_metric_comparison
+from src.dashboard.components.plotting import plot_metric_comparison
 
 def render_comparison(available_models):
     """Render the Comparison tab."""
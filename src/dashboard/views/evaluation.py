@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from src.dashboard.utils.data_manager import get_train_test_data
-from src.dashboard.utils.model_manager import load_model
+from src.dashboard.components.data_manager import get_train_test_data
+from src.dashboard.components.model_manager import load_model
 from src.dashboard.utils.metrics import compute_metrics, get_confusion_matrix
-from src.dashboard.utils.plotting import plot_confusion_matrix, plot_calibration_curve, plot_grouped_accuracy
+from src.dashboard.components.plotting import plot_confusion_matrix, plot_calibration_curve, plot_grouped_accuracy
 
 def render_evaluation(available_models):
     """Render the Evaluation tab."""
@@ -4,9 +4,9 @@ import numpy as np
 import json
 import os
 from src.dashboard.config import BASE_DIR
-from src.dashboard.utils.data_manager import get_player_stats
-from src.dashboard.utils.model_manager import load_model, get_model_features
-from src.dashboard.utils.plotting import plot_gauge
+from src.dashboard.components.data_manager import get_player_stats
+from src.dashboard.components.model_manager import load_model, get_model_features
+from src.dashboard.components.plotting import plot_gauge
 
 @st.cache_data
 def load_player_state():
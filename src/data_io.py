@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Explicit schema of atp_tennis.csv
+PLAYER_COLS = ['Player_1', 'Player_2', 'Winner']
+CATEGORICAL_COLS = ['Tournament', 'Series', 'Court', 'Surface', 'Round']
+FLOAT32_COLS = ['Rank_1', 'Rank_2', 'Pts_1', 'Pts_2', 'Odd_1', 'Odd_2']
+INT_COLS = {'Best of': 'int8'}
+DATE_FORMAT = '%Y-%m-%d'
+
+# Columnar cache of cleaned frames, one entry per source file
+CACHE_DIR = os.path.join('data', 'cache')
+# Materialized feature tables produced by TennisPreprocessor.process()
+FEATURES_DIR = os.path.join('data', 'features')
+
+
+def read_matches(path, usecols=None, date_format=DATE_FORMAT, engine=None):
+    """
+    Typed, column-pruned read of the match CSV.
+
+    - Low-cardinality text columns are categorical.
+    - Player_1, Player_2 and Winner share one set of categories, so
+      `Winner == Player_1` stays a cheap comparison of integer codes.
+    - Odds, points and ranks are float32, 'Best of' is int8.
+    - Dates are parsed with a fixed format (unparseable values become NaT).
+    - The pyarrow CSV engine is used when pyarrow is installed.
+
+    usecols: optional list of columns to keep (Date is always read).
+    """
+    engine = engine or ('pyarrow' if HAS_PYARROW else 'c')
+    header = pd.read_csv(path, nrows=0).columns
+    cols = [c for c in header if usecols is None or c in usecols or c == 'Date']
+
+    dtype = {c: 'float32' for c in FLOAT32_COLS if c in cols}
+    dtype.update({c: 'category' for c in CATEGORICAL_COLS if c in cols})
+    dtype.update({c: t for c, t in INT_COLS.items() if c in cols})
+
+    df = pd.read_csv(path, usecols=cols, dtype=dtype, engine=engine)
+
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], format=date_format, errors='coerce')
+
+    return share_player_categories(df)
+
+
+def share_player_categories(df):
+    """
+    Player_1, Player_2 and Winner as categoricals over one sorted set of
+    names, in place. Sorted categories keep groupby/sort order identical to
+    plain strings.
+    """
+    players = [c for c in PLAYER_COLS if c in df.columns]
+    if players:
+        names = pd.Index(pd.unique(pd.concat([df[c] for c in players], ignore_index=True).dropna())).sort_values()
+        player_dtype = pd.CategoricalDtype(categories=names)
+        for c in players:
+            df[c] = df[c].astype(player_dtype)
+    return df
+
+
+def apply_lean_schema(df):
+    """Cast an already loaded match frame to the read_matches() dtypes, in place."""
+    for c in CATEGORICAL_COLS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype('category')
+    for c in FLOAT32_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype('float32')
+    for c, dtype in INT_COLS.items():
+        if c in df.columns and df[c].notna().all():
+            df[c] = df[c].astype(dtype)
+    if not all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in PLAYER_COLS if c in df.columns):
+        share_player_categories(df)
+    return df
+
+
+def read_match_chunks(path, chunk_size):
+    """Read the match CSV in chunks of chunk_size rows, text columns as strings in every chunk."""
+    header = pd.read_csv(path, nrows=0).columns
+    text_cols = PLAYER_COLS + CATEGORICAL_COLS + ['Score']
+    dtype = {c: 'str' for c in text_cols if c in header}
+    return pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+
+class FrameWriter:
+    """
+    Append frames chunk by chunk to one Parquet file (or CSV without
+    pyarrow). Every chunk is cast to the schema of the first one.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if HAS_PYARROW:
+            if self._writer is None:
+                # Categoricals are stored as their values: later chunks have other categories
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                self._schema = pa.schema([
+                    field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                    for field in schema
+                ], metadata=schema.metadata)
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        else:
+            df.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(path, params):
+    """Cache key from the source content hash and the (JSON-serializable) parameters."""
+    payload = json.dumps({'source': file_hash(path), 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def code_fingerprint(paths):
+    """Hash of source files, so artifacts are invalidated when feature code changes."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _cache_stem(path):
+    return os.path.splitext(os.path.basename(str(path)))[0]
+
+
+def cache_entry(cache_dir, path, key):
+    """Path prefix of a cache entry; companion files add their own suffixes."""
+    return os.path.join(cache_dir, f"{_cache_stem(path)}-{key}")
+
+
+def read_cached_frame(cache_dir, path, key):
+    """Return (df, meta) for a cache hit, or None on a miss or without pyarrow."""
+    if not HAS_PYARROW:
+        return None
+    entry = cache_entry(cache_dir, path, key)
+    if not (os.path.exists(entry + '.parquet') and os.path.exists(entry + '.json')):
+        return None
+    with open(entry + '.json') as f:
+        meta = json.load(f)
+    return pd.read_parquet(entry + '.parquet'), meta
+
+
+def write_cached_frame(cache_dir, path, key, df, meta):
+    """Store df under key and drop stale entries for the same source file."""
+    if not HAS_PYARROW:
+        print("pyarrow not installed, skipping Parquet cache.")
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = _cache_stem(path)
+    for name in os.listdir(cache_dir):
+        entry_stem, _, entry_key = name.split('.', 1)[0].rpartition('-')
+        if entry_stem == stem and entry_key != key:
+            os.remove(os.path.join(cache_dir, name))
+
+    entry = cache_entry(cache_dir, path, key)
+    df.to_parquet(entry + '.parquet', index=False)
+    with open(entry + '.json', 'w') as f:
+        json.dump(meta, f)
@@ -0,0 +1,615 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.players import PlayerIndex, player_ids
+
+
+def replay_track(a_ids, b_ids, a_won, ratings, k):
+    """
+    Sequential Elo over one rating track, with the exact arithmetic of
+    EloSystem.update_rating.
+
+    a_ids, b_ids, a_won are plain lists (one entry per match) and ratings is a
+    list indexed by those IDs, updated in place. Returns the pre-match ratings
+    of both sides and the expected score of side a, as lists.
+    """
+    n = len(a_ids)
+    pre_a = [0.0] * n
+    pre_b = [0.0] * n
+    prob_a = [0.0] * n
+
+    for i in range(n):
+        a = a_ids[i]
+        b = b_ids[i]
+
+        # 1. Ratings BEFORE the match (features)
+        ra = ratings[a]
+        rb = ratings[b]
+        pre_a[i] = ra
+        pre_b[i] = rb
+        p = 1 / (1 + 10 ** ((rb - ra) / 400))
+        prob_a[i] = p
+
+        # 2. Update AFTER the match: the winner's expectation is p when a wins
+        if a_won[i]:
+            exp_l = 1 / (1 + 10 ** ((ra - rb) / 400))
+            ratings[a] = ra + k * (1 - p)
+            ratings[b] = rb + k * (0 - exp_l)
+        else:
+            exp_w = 1 / (1 + 10 ** ((ra - rb) / 400))
+            ratings[b] = rb + k * (1 - exp_w)
+            ratings[a] = ra + k * (0 - p)
+
+    return pre_a, pre_b, prob_a
+
+
+def _replay_surface(a_ids, b_ids, a_won, seed, k):
+    """Worker entry point: replay one surface track from its seed ratings."""
+    ratings = seed.tolist()
+    pre_a, pre_b, _ = replay_track(a_ids.tolist(), b_ids.tolist(), a_won.tolist(), ratings, k)
+    return np.array(pre_a), np.array(pre_b), np.array(ratings)
+
+
+class ArrayEloEngine:
+    """
+    Array-backed replacement for the iterrows() Elo loop.
+
+    Players and surfaces are encoded as integer IDs once, global ratings live in
+    a flat array of size n_players and surface ratings in a flat array of size
+    n_surfaces * n_players. Each track is then replayed by replay_track() over
+    plain int/float sequences, with the exact same arithmetic as EloSystem so
+    the resulting elo_* columns are bit-for-bit identical.
+    """
+
+    def __init__(self, k_factor=20, initial_rating=1500):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+
+    @staticmethod
+    def encode(df, names=None):
+        """
+        Encode the match frame into integer arrays.
+        Returns (p1_ids, p2_ids, p1_won, surface_ids, players, surfaces).
+
+        With interned player IDs (p1_id / p2_id columns, names = the
+        PlayerIndex names) the int32 IDs are compacted to the players of df
+        instead of factorizing the name strings. Missing players (ID -1 or
+        NaN name) share one slot named None, never seeded or written back.
+        """
+        n = len(df)
+        if names is not None and 'p1_id' in df.columns:
+            seen, codes = np.unique(np.concatenate([df['p1_id'].to_numpy(), df['p2_id'].to_numpy()]),
+                                    return_inverse=True)
+            # Missing players (-1) share one slot named None: never seeded or written back
+            players = np.where(seen >= 0, np.asarray(names, dtype=object)[np.maximum(seen, 0)], None)
+        else:
+            codes, players = pd.factorize(
+                pd.concat([df['Player_1'], df['Player_2']], ignore_index=True), use_na_sentinel=False
+            )
+            players = [None if pd.isna(p) else p for p in players]
+        p1_ids = codes[:n]
+        p2_ids = codes[n:]
+        p1_won = (df['Winner'] == df['Player_1']).to_numpy()
+        # NaN surfaces get their own table, exactly like the dict-based system
+        surface_ids, surfaces = pd.factorize(df['Surface'], use_na_sentinel=False)
+        return p1_ids, p2_ids, p1_won, surface_ids, list(players), list(surfaces)
+
+    def _initial_arrays(self, elo_system, players, surfaces):
+        """Build the flat rating arrays, seeded from an existing EloSystem if any."""
+        n_players = len(players)
+        ratings = np.full(n_players, self.initial_rating, dtype=np.float64)
+        surface_ratings = np.full(len(surfaces) * n_players, self.initial_rating, dtype=np.float64)
+
+        if elo_system is not None:
+            for i, player in enumerate(players):
+                if player is not None and player in elo_system.ratings:
+                    ratings[i] = elo_system.ratings[player]
+            for s, surface in enumerate(surfaces):
+                table = elo_system.surface_ratings.get(surface, {})
+                for i, player in enumerate(players):
+                    if player is not None and player in table:
+                        surface_ratings[s * n_players + i] = table[player]
+
+        return ratings, surface_ratings
+
+    def run(self, df, elo_system=None, n_jobs=1, names=None):
+        """
+        Replay all matches in df (already sorted chronologically).
+
+        If elo_system is given, ratings start from its current state and the
+        final state is written back into its dicts, so the EloSystem can still
+        be used for export and lookups afterwards.
+
+        With n_jobs > 1 each surface track is replayed in its own worker
+        process while the global track runs in this one. Surface tables are
+        independent (a clay match never touches grass), so the columns are the
+        same as the sequential run. Workers are spawned (fresh interpreters),
+        so their start-up only pays off on multi-core machines and long histories.
+
+        names: PlayerIndex names, to encode from the interned p1_id / p2_id.
+
+        Returns a dict of feature arrays keyed by the elo_* column names.
+        """
+        p1_ids, p2_ids, p1_won, surface_ids, players, surfaces = self.encode(df, names)
+        n_players = len(players)
+        ratings, surface_ratings = self._initial_arrays(elo_system, players, surfaces)
+        g = ratings.tolist()
+
+        if n_jobs > 1 and len(surfaces) > 1:
+            # spawn, as in src.modeling: never fork a process holding large frames and threads
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(surfaces)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                pending = self._submit_surfaces(pool, p1_ids, p2_ids, p1_won, surface_ids, surface_ratings, n_players)
+                # The global track needs the full sequence: run it here meanwhile
+                elo_p1, elo_p2, prob_p1 = replay_track(
+                    p1_ids.tolist(), p2_ids.tolist(), p1_won.tolist(), g, self.k_factor
+                )
+                surf_p1 = np.empty(len(df), dtype=np.float64)
+                surf_p2 = np.empty(len(df), dtype=np.float64)
+                for rows, cells, future in pending:
+                    pre_a, pre_b, final = future.result()
+                    surf_p1[rows] = pre_a
+                    surf_p2[rows] = pre_b
+                    surface_ratings[cells] = final
+            sr = surface_ratings.tolist()
+        else:
+            # All surfaces in one pass: flat cell = surface * n_players + player
+            sr = surface_ratings.tolist()
+            offsets = surface_ids * n_players
+            surf_p1, surf_p2, _ = replay_track(
+                (offsets + p1_ids).tolist(), (offsets + p2_ids).tolist(), p1_won.tolist(), sr, self.k_factor
+            )
+            elo_p1, elo_p2, prob_p1 = replay_track(
+                p1_ids.tolist(), p2_ids.tolist(), p1_won.tolist(), g, self.k_factor
+            )
+
+        if elo_system is not None:
+            self._write_back(elo_system, g, sr, p1_ids, p2_ids, surface_ids, players, surfaces)
+
+        prob_p1 = np.array(prob_p1, dtype=np.float64)
+        return {
+            'elo_p1': np.array(elo_p1, dtype=np.float64),
+            'elo_p2': np.array(elo_p2, dtype=np.float64),
+            'elo_prob_p1': prob_p1,
+            'elo_prob_p2': 1 - prob_p1,
+            'elo_surf_p1': np.array(surf_p1, dtype=np.float64),
+            'elo_surf_p2': np.array(surf_p2, dtype=np.float64),
+        }
+
+    def _submit_surfaces(self, pool, p1_ids, p2_ids, p1_won, surface_ids, surface_ratings, n_players):
+        """
+        Partition matches by surface and submit one track replay per surface.
+        Returns [(match rows, flat rating cells, future)].
+        """
+        pending = []
+        for s in range(len(surface_ratings) // n_players):
+            rows = np.flatnonzero(surface_ids == s)
+            # Re-encode players locally so each worker only ships its own table
+            local_players, local = np.unique(np.concatenate([p1_ids[rows], p2_ids[rows]]), return_inverse=True)
+            cells = s * n_players + local_players
+            future = pool.submit(
+                _replay_surface, local[:len(rows)], local[len(rows):], p1_won[rows],
+                surface_ratings[cells], self.k_factor
+            )
+            pending.append((rows, cells, future))
+        return pending
+
+    @staticmethod
+    def _write_back(elo_system, g, sr, p1_ids, p2_ids, surface_ids, players, surfaces):
+        """Copy the final array state back into the EloSystem dicts."""
+        n_players = len(players)
+        seen = np.unique(np.concatenate([p1_ids, p2_ids]))
+        for i in seen.tolist():
+            if players[i] is not None:
+                elo_system.ratings[players[i]] = g[i]
+
+        # A player only has a surface entry once they have played on that surface
+        flat = np.unique(np.concatenate([surface_ids * n_players + p1_ids,
+                                         surface_ids * n_players + p2_ids]))
+        for idx in flat.tolist():
+            s, i = divmod(idx, n_players)
+            if players[i] is not None:
+                elo_system.surface_ratings.setdefault(surfaces[s], {})[players[i]] = sr[idx]
+
+
+class RatingHistory:
+    """
+    Point-in-time rating index: what was a player's Elo as of a given date.
+
+    For each track (global, and one per surface) the post-match ratings are
+    stored in flat arrays sorted by (player, date). Lookups are binary searches
+    on a composite integer key player_id * 2**20 + day, so a single as-of query
+    is O(log n) and a batch of (player, date) pairs is one np.searchsorted call.
+    Player IDs are those of the PlayerIndex it is built on.
+    """
+
+    DAY_BITS = 20  # ~2870 years of daily resolution per player
+
+    def __init__(self, players, base_date, initial_rating, tracks):
+        self.players = players  # PlayerIndex
+        self.base_date = pd.Timestamp(base_date)
+        self.initial_rating = initial_rating
+        # {track: (keys, days, ratings)}, track is None for global or a surface name
+        self.tracks = tracks
+
+    @classmethod
+    def build(cls, df, elo_system, players=None):
+        """
+        Build the index from a replayed frame (with elo_* columns) and the
+        EloSystem holding the ratings after the last match, keyed on the
+        IDs of players (the preprocessor's PlayerIndex; a new one if None).
+
+        The rating after a player's match is the pre-match rating of their next
+        match on the same track, or their final rating for the last one, so the
+        history is exact and needs no extra work inside the replay loop.
+        """
+        n = len(df)
+        players = players if players is not None else PlayerIndex()
+        codes = np.concatenate(player_ids(df, players))
+        known = codes >= 0  # Missing players have no history
+        names = players.names
+        dates = df['Date'].to_numpy(dtype='datetime64[D]')
+        base_date = dates.min() if n else np.datetime64('1900-01-01', 'D')
+        day = np.tile((dates - base_date).astype(np.int64) + 1, 2)
+        order_in_frame = np.tile(np.arange(n), 2)
+
+        tracks = {}
+        pre_global = np.concatenate([df['elo_p1'].to_numpy(), df['elo_p2'].to_numpy()])
+        final_global = np.array([elo_system.ratings.get(p, elo_system.initial_rating) for p in names], dtype=np.float64)
+        tracks[None] = cls._build_track(codes[known], day[known], order_in_frame[known], pre_global[known],
+                                        final_global)
+
+        if 'elo_surf_p1' not in df.columns:
+            return cls(players, base_date, elo_system.initial_rating, tracks)
+
+        pre_surface = np.concatenate([df['elo_surf_p1'].to_numpy(), df['elo_surf_p2'].to_numpy()])
+        surface = np.tile(df['Surface'].to_numpy(), 2)
+        for surf in pd.unique(df['Surface'].dropna()):
+            mask = (surface == surf) & known
+            table = elo_system.surface_ratings.get(surf, {})
+            final_surf = np.array([table.get(p, elo_system.initial_rating) for p in names], dtype=np.float64)
+            tracks[surf] = cls._build_track(codes[mask], day[mask], order_in_frame[mask],
+                                            pre_surface[mask], final_surf)
+
+        return cls(players, base_date, elo_system.initial_rating, tracks)
+
+    @classmethod
+    def _build_track(cls, player, day, order_in_frame, pre, final):
+        """Sort one track by (player, match order) and convert pre- to post-match ratings."""
+        order = np.lexsort((order_in_frame, player))
+        player = player[order]
+        day = day[order]
+        pre = pre[order]
+
+        post = np.empty_like(pre)
+        same_next = np.zeros(len(player), dtype=bool)
+        same_next[:-1] = player[1:] == player[:-1]
+        post[:-1] = pre[1:]
+        post[~same_next] = final[player[~same_next]]
+
+        keys = (player.astype(np.int64) << cls.DAY_BITS) + day
+        return keys, day, post
+
+    def _query_keys(self, player_ids, dates):
+        days = (np.asarray(dates, dtype='datetime64[D]') - self.base_date.to_datetime64().astype('datetime64[D]')).astype(np.int64) + 1
+        days = np.clip(days, 0, (1 << self.DAY_BITS) - 1)
+        return (np.asarray(player_ids, dtype=np.int64) << self.DAY_BITS) + days
+
+    def as_of_batch(self, players, dates, surface=None, inclusive=False):
+        """
+        Ratings of many players at many dates in one vectorized call.
+
+        By default the rating is the one going INTO a match played on that date
+        (only earlier days count). With inclusive=True, matches on the date
+        itself are included. Unknown players get the initial rating.
+        """
+        ids = np.array([self.players.id(p) for p in players], dtype=np.int64)
+        result = np.full(len(ids), self.initial_rating, dtype=np.float64)
+
+        if surface not in self.tracks:
+            return result
+        keys, _, ratings = self.tracks[surface]
+
+        known = ids >= 0
+        query = self._query_keys(ids[known], np.asarray(dates)[known])
+        pos = np.searchsorted(keys, query, side='right' if inclusive else 'left') - 1
+
+        # The entry found must belong to the same player
+        valid = pos >= 0
+        valid[valid] = (keys[pos[valid]] >> self.DAY_BITS) == ids[known][valid]
+        values = np.full(len(query), self.initial_rating, dtype=np.float64)
+        values[valid] = ratings[pos[valid]]
+        result[known] = values
+        return result
+
+    def as_of(self, player, date, surface=None, inclusive=False):
+        """Rating of one player as of a date (O(log n) binary search)."""
+        return float(self.as_of_batch([player], [pd.Timestamp(date)], surface, inclusive)[0])
+
+    def player_history(self, player, surface=None):
+        """All post-match ratings of a player on a track, as a Date/Elo frame."""
+        pid = self.players.id(player)
+        if pid < 0 or surface not in self.tracks:
+            return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Elo': pd.Series(dtype=np.float64)})
+
+        keys, days, ratings = self.tracks[surface]
+        lo, hi = np.searchsorted(keys, [pid << self.DAY_BITS, (pid + 1) << self.DAY_BITS])
+        dates = self.base_date + pd.to_timedelta(days[lo:hi] - 1, unit='D')
+        return pd.DataFrame({'Date': dates, 'Elo': ratings[lo:hi]})
+
+
+def sweep_elo(df, k_factors=(20,), initial_ratings=(1500,), surface_weights=(0.0,), eval_start=None):
+    """
+    Evaluate a grid of Elo configurations in a single chronological replay.
+
+    Ratings are carried as matrices of shape (players, configs), one column per
+    (k_factor, initial_rating, surface_weight) combination, so each match is a
+    handful of vectorized row operations whatever the grid size.
+
+    The win probability of a configuration blends the two tracks:
+        diff = (1 - w) * (global_p2 - global_p1) + w * (surface_p2 - surface_p1)
+        elo_prob_p1 = 1 / (1 + 10 ** (diff / 400))
+
+    Returns one row per configuration with log-loss, Brier score and accuracy
+    of elo_prob_p1, computed on matches from eval_start onwards (all if None).
+
+    initial_ratings is not a tuning axis: every player starts from the same
+    value and predictions depend only on rating differences, so configurations
+    that differ only in initial_rating score the same (up to float rounding).
+    It defaults to the single value 1500; sweep k_factors and surface_weights.
+    """
+    grid = pd.MultiIndex.from_product(
+        [list(k_factors), list(initial_ratings), list(surface_weights)],
+        names=['k_factor', 'initial_rating', 'surface_weight']
+    ).to_frame(index=False)
+    k = grid['k_factor'].to_numpy(dtype=np.float64)
+    w = grid['surface_weight'].to_numpy(dtype=np.float64)
+    init = grid['initial_rating'].to_numpy(dtype=np.float64)
+
+    p1_ids, p2_ids, p1_won, surface_ids, players, surfaces = ArrayEloEngine.encode(df)
+    n_players = len(players)
+    n, n_configs = len(df), len(grid)
+
+    # Global rows first, then one block of rows per surface, in a single matrix
+    R = np.tile(init, ((1 + len(surfaces)) * n_players, 1))
+    rows = np.stack([p1_ids, p2_ids,
+                     (surface_ids + 1) * n_players + p1_ids,
+                     (surface_ids + 1) * n_players + p2_ids], axis=1)
+    signs = np.array([[1.0], [-1.0], [1.0], [-1.0]])
+    blend = np.stack([1 - w, w])
+    probs = np.empty((n, n_configs), dtype=np.float64)
+    y = p1_won.astype(np.float64).tolist()
+
+    for i in range(n):
+        idx = rows[i]
+        r = R[idx]                       # (4, configs): g1, g2, s1, s2
+        diffs = r[1::2] - r[0::2]        # (2, configs): global and surface diffs
+
+        # Pre-match prediction for every configuration
+        probs[i] = 1 / (1 + 10 ** ((blend * diffs).sum(axis=0) / 400))
+
+        # Post-match updates (loser's expectation is 1 - winner's)
+        delta = k * (y[i] - 1 / (1 + 10 ** (diffs / 400)))
+        R[idx] = r + signs * np.repeat(delta, 2, axis=0)
+
+    mask = np.ones(n, dtype=bool) if eval_start is None else (df['Date'] >= pd.Timestamp(eval_start)).to_numpy()
+    p = np.clip(probs[mask], 1e-15, 1 - 1e-15)
+    y = p1_won[mask].astype(np.float64)[:, None]
+
+    grid['log_loss'] = -(y * np.log(p) + (1 - y) * np.log(1 - p)).mean(axis=0)
+    grid['brier'] = ((p - y) ** 2).mean(axis=0)
+    grid['accuracy'] = ((p > 0.5) == (y == 1)).mean(axis=0)
+    return grid.sort_values('log_loss').reset_index(drop=True)
+
+
+# Default tracks: (name, key). key=None is the global track, otherwise one or
+# more match columns whose values each get their own rating table.
+DEFAULT_TRACKS = [('elo', None), ('elo_surf', 'Surface')]
+
+
+class MultiTrackEloEngine:
+    """
+    Elo over any number of declared tracks in a single pass.
+
+    Every track value is a "slot" (global = 1 slot, Surface = one per surface,
+    Court = indoor/outdoor, ...) and all slots live in one ratings array of
+    shape (players, slots). Per match, each player touches one slot per track,
+    so an update is one gather, a few vectorized ops and one scatter over
+    2 * n_tracks cells; adding a track adds two cells, not another dict lookup.
+
+    Columns produced per track: f'{name}_p1' and f'{name}_p2', plus
+    elo_prob_p1 / elo_prob_p2 from the first track.
+    """
+
+    def __init__(self, tracks=None, k_factor=20, initial_rating=1500):
+        self.tracks = list(tracks) if tracks is not None else list(DEFAULT_TRACKS)
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.player_ids = {}
+        self.slot_ids = {}  # {(track_name, key_value): column in ratings}
+        self.ratings = None
+        self._touched = np.array([], dtype=np.int64)  # flat cells that played at least once
+
+    @staticmethod
+    def _track_codes(df, key):
+        """Integer code per match and the list of values for one track key."""
+        if key is None:
+            return np.zeros(len(df), dtype=np.int64), [None]
+        if isinstance(key, str):
+            codes, values = pd.factorize(df[key], use_na_sentinel=False)
+            return codes, list(values)
+        codes, values = pd.factorize(pd.MultiIndex.from_frame(df[list(key)]))
+        return codes, list(values)
+
+    def _seed(self, flat, elo_system, players, slots, global_track, surface_track):
+        """Start the global and surface track slots from an EloSystem's current ratings."""
+        n_slots = len(slots)
+        for j, (name, value) in enumerate(slots):
+            if name == global_track:
+                table = elo_system.ratings
+            elif name == surface_track:
+                table = elo_system.surface_ratings.get(value, {})
+            else:
+                continue  # Other tracks have no state in EloSystem
+            for i, player in enumerate(players):
+                if player is not None and player in table:
+                    flat[i * n_slots + j] = table[player]
+
+    def run(self, df, elo_system=None, global_track='elo', surface_track='elo_surf'):
+        """
+        Replay df (sorted chronologically). Returns a dict of feature arrays.
+
+        If elo_system is given, the global_track and surface_track slots start
+        from its current ratings (as ArrayEloEngine does), so chunked or
+        checkpoint-resumed runs continue the same ratings. Other tracks start
+        from initial_rating.
+        """
+        p1_ids, p2_ids, p1_won, _, players, _ = ArrayEloEngine.encode(df)
+        n, n_tracks = len(df), len(self.tracks)
+
+        # Slot index of every match for every track: (n, n_tracks)
+        slot_cols = []
+        slots = []
+        for name, key in self.tracks:
+            codes, values = self._track_codes(df, key)
+            slot_cols.append(codes + len(slots))
+            slots.extend((name, v) for v in values)
+        match_slots = np.stack(slot_cols, axis=1)
+        n_slots = len(slots)
+
+        # Flat cell indices into the (players, slots) array: p1 cells then p2 cells
+        cells = np.concatenate([p1_ids[:, None] * n_slots + match_slots,
+                                p2_ids[:, None] * n_slots + match_slots], axis=1)
+
+        flat = np.full(len(players) * n_slots, self.initial_rating, dtype=np.float64)
+        if elo_system is not None:
+            self._seed(flat, elo_system, players, slots, global_track, surface_track)
+        pre = np.empty((n, 2 * n_tracks), dtype=np.float64)
+        y = p1_won.astype(np.float64).tolist()
+        k = self.k_factor
+
+        for i in range(n):
+            idx = cells[i]
+            r = flat[idx]
+            pre[i] = r
+            r1 = r[:n_tracks]
+            r2 = r[n_tracks:]
+            # Expected score of p1 on every track; p2's is 1 - e
+            e = 1 / (1 + 10 ** ((r2 - r1) / 400))
+            delta = k * (y[i] - e)
+            flat[idx] = np.concatenate([r1 + delta, r2 - delta])
+
+        self.player_ids = {p: i for i, p in enumerate(players)}
+        self.slot_ids = {slot: j for j, slot in enumerate(slots)}
+        self.ratings = flat.reshape(len(players), n_slots)
+        self._touched = np.unique(cells)
+
+        out = {}
+        for t, (name, _) in enumerate(self.tracks):
+            out[f'{name}_p1'] = pre[:, t]
+            out[f'{name}_p2'] = pre[:, n_tracks + t]
+        first = self.tracks[0][0]
+        prob_p1 = 1 / (1 + 10 ** ((out[f'{first}_p2'] - out[f'{first}_p1']) / 400))
+        out['elo_prob_p1'] = prob_p1
+        out['elo_prob_p2'] = 1 - prob_p1
+        return out
+
+    def rating(self, player, track, value=None):
+        """Current rating of a player on a track slot (initial rating if unseen)."""
+        if player not in self.player_ids or (track, value) not in self.slot_ids:
+            return self.initial_rating
+        return float(self.ratings[self.player_ids[player], self.slot_ids[(track, value)]])
+
+    def write_back(self, elo_system, global_track='elo', surface_track='elo_surf'):
+        """Copy the global and surface tracks into EloSystem dicts (played cells only)."""
+        players = list(self.player_ids)
+        slots = list(self.slot_ids)
+        flat = self.ratings.ravel()
+        for cell in self._touched.tolist():
+            i, j = divmod(cell, len(slots))
+            name, value = slots[j]
+            if players[i] is None:
+                continue
+            if name == global_track:
+                elo_system.ratings[players[i]] = float(flat[cell])
+            elif name == surface_track:
+                elo_system.surface_ratings.setdefault(value, {})[players[i]] = float(flat[cell])
+
+
+class PeriodEloEngine:
+    """
+    Rating-period (Glicko-style) batch Elo.
+
+    Matches are grouped into periods of the given pandas frequency ('D' for a
+    tournament day, 'W' for a week, 'M' for a month). All matches of a period
+    are scored against the ratings frozen at the period start, then every
+    update of the period is applied at once with np.add.at. A match's features
+    therefore only depend on matches from strictly earlier periods, even when
+    several matches share a date.
+    """
+
+    def __init__(self, period='W', k_factor=20, initial_rating=1500):
+        self.period = period
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+
+    def period_bounds(self, df):
+        """Start/end row of each period; df must be sorted by Date."""
+        codes = df['Date'].dt.to_period(self.period).astype('int64').to_numpy()
+        if (np.diff(codes) < 0).any():
+            raise ValueError("Matches must be sorted by Date for period updates.")
+        starts = np.flatnonzero(np.r_[len(codes) > 0, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)].astype(np.int64)
+        return starts, ends
+
+    def run(self, df, elo_system=None):
+        """Replay df period by period. Returns a dict of elo_* feature arrays."""
+        p1_ids, p2_ids, p1_won, surface_ids, players, surfaces = ArrayEloEngine.encode(df)
+        n_players = len(players)
+        base = ArrayEloEngine(self.k_factor, self.initial_rating)
+        g, sr = base._initial_arrays(elo_system, players, surfaces)
+        s1 = surface_ids * n_players + p1_ids
+        s2 = surface_ids * n_players + p2_ids
+        y = p1_won.astype(np.float64)
+        k = self.k_factor
+
+        n = len(df)
+        elo_p1 = np.empty(n)
+        elo_p2 = np.empty(n)
+        surf_p1 = np.empty(n)
+        surf_p2 = np.empty(n)
+
+        starts, ends = self.period_bounds(df)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            a, b = p1_ids[start:end], p2_ids[start:end]
+            sa, sb = s1[start:end], s2[start:end]
+
+            # 1. Features: ratings frozen at the period start
+            ga, gb = g[a], g[b]
+            ra, rb = sr[sa], sr[sb]
+            elo_p1[start:end], elo_p2[start:end] = ga, gb
+            surf_p1[start:end], surf_p2[start:end] = ra, rb
+
+            # 2. Apply every update of the period at once (players may repeat)
+            delta = k * (y[start:end] - 1 / (1 + 10 ** ((gb - ga) / 400)))
+            np.add.at(g, a, delta)
+            np.add.at(g, b, -delta)
+            delta_s = k * (y[start:end] - 1 / (1 + 10 ** ((rb - ra) / 400)))
+            np.add.at(sr, sa, delta_s)
+            np.add.at(sr, sb, -delta_s)
+
+        if elo_system is not None:
+            base._write_back(elo_system, g.tolist(), sr.tolist(), p1_ids, p2_ids, surface_ids, players, surfaces)
+
+        prob_p1 = 1 / (1 + 10 ** ((elo_p2 - elo_p1) / 400))
+        return {
+            'elo_p1': elo_p1,
+            'elo_p2': elo_p2,
+            'elo_prob_p1': prob_p1,
+            'elo_prob_p2': 1 - prob_p1,
+            'elo_surf_p1': surf_p1,
+            'elo_surf_p2': surf_p2,
+        }
@@ -0,0 +1,717 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.data_io import HAS_PYARROW
+from src.players import PlayerIndex, player_ids
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+
+class FormState:
+    """
+    Per-player running state behind the win-rate features.
+
+    Keeps, per player: matches played, wins, per-surface matches and wins, and
+    ring buffers of the most recent results, overall and per surface. With it,
+    the pre-match features of newly appended matches are computed from the
+    state alone, without rebuilding the long-format table of the whole history.
+
+    Produces exactly the same values as TennisPreprocessor.add_features():
+    win_rate_career, win_rate_last_<window> and win_rate_surface for each side,
+    plus win_rate_last_<w> and win_rate_surface_last_<w> for the extra windows.
+
+    Rows of the state arrays are PlayerIndex IDs + 1 (row 0 collects missing
+    players), so the state shares the preprocessor's player dictionary.
+    """
+
+    def __init__(self, window=10, windows=(), players=None):
+        self.window = window
+        self.windows = tuple(windows)  # Extra windows, overall and per surface
+        self.size = max((window,) + self.windows)
+        self.surface_size = max(self.windows, default=0)
+        self.players = players if players is not None else PlayerIndex()
+        self.surface_ids = {}
+        self.matches = np.zeros(0, dtype=np.int64)
+        self.wins = np.zeros(0, dtype=np.int64)
+        self.surface_matches = np.zeros((0, 0), dtype=np.int64)
+        self.surface_wins = np.zeros((0, 0), dtype=np.int64)
+        # Slot of a player's j-th match is j % size (j-th match on a surface: j % surface_size)
+        self.recent = np.zeros((0, self.size), dtype=np.int8)
+        self.recent_surface = np.zeros((0, 0, self.surface_size), dtype=np.int8)
+
+    def feature_names(self):
+        """Long-format feature names, in column order."""
+        names = ['win_rate_career', f'win_rate_last_{self.window}', 'win_rate_surface']
+        names += [f'win_rate_last_{w}' for w in self.windows if w != self.window]
+        return names + [f'win_rate_surface_last_{w}' for w in self.windows]
+
+    def _grow(self, surfaces):
+        """Register unseen surfaces and enlarge the state arrays to every registered player."""
+        for s in surfaces:
+            if s not in self.surface_ids:
+                self.surface_ids[s] = len(self.surface_ids)
+
+        n_players, n_surfaces = len(self.players) + 1, len(self.surface_ids)
+        extra = n_players - len(self.matches)
+        extra_s = n_surfaces - self.surface_matches.shape[1]
+        if extra or extra_s:
+            self.matches = np.pad(self.matches, (0, extra))
+            self.wins = np.pad(self.wins, (0, extra))
+            self.surface_matches = np.pad(self.surface_matches, ((0, extra), (0, extra_s)))
+            self.surface_wins = np.pad(self.surface_wins, ((0, extra), (0, extra_s)))
+            self.recent = np.pad(self.recent, ((0, extra), (0, 0)))
+            self.recent_surface = np.pad(self.recent_surface, ((0, extra), (0, extra_s), (0, 0)))
+
+    @staticmethod
+    def _long_arrays(df, players):
+        """
+        Long-format (player row, won, surface) arrays, ordered match by match,
+        P1 before P2. Player rows are PlayerIndex IDs + 1 (0 = missing player).
+        """
+        p1, p2 = player_ids(df, players)
+        rows = np.column_stack([p1, p2]).ravel() + 1
+        p1_won = (df['Winner'] == df['Player_1']).to_numpy()
+        p2_won = (df['Winner'] == df['Player_2']).to_numpy()
+        won = np.column_stack([p1_won, p2_won]).ravel().astype(np.int64)
+        surfaces = np.repeat(df['Surface'].to_numpy(dtype=object), 2)
+        return rows, won, surfaces
+
+    @staticmethod
+    def _match_numbers(group):
+        """j-th match (0-based) of each row within its group, rows in chronological order."""
+        order = np.argsort(group, kind='stable')
+        j = np.empty(len(group), dtype=np.int64)
+        j[order] = grouped_exclusive_cumcount(group[order])
+        return j
+
+    @classmethod
+    def from_history(cls, df, window=10, windows=(), players=None):
+        """Build the state after all matches in df (chronologically sorted), vectorized."""
+        state = cls(window, windows, players)
+        pid, won, surfaces = cls._long_arrays(df, state.players)
+        state._grow(pd.unique(surfaces))
+        sid = np.array([state.surface_ids[s] for s in surfaces], dtype=np.int64)
+        n_players, n_surfaces = len(state.matches), len(state.surface_ids)
+
+        state.matches = np.bincount(pid, minlength=n_players)
+        state.wins = np.bincount(pid, weights=won, minlength=n_players).astype(np.int64)
+        cell = pid * n_surfaces + sid
+        cell_matches = np.bincount(cell, minlength=n_players * n_surfaces)
+        state.surface_matches = cell_matches.reshape(n_players, n_surfaces)
+        state.surface_wins = np.bincount(cell, weights=won, minlength=n_players * n_surfaces) \
+            .astype(np.int64).reshape(n_players, n_surfaces)
+
+        j = cls._match_numbers(pid)
+        keep = j >= (state.matches[pid] - state.size)
+        state.recent[pid[keep], j[keep] % state.size] = won[keep]
+
+        if state.surface_size:
+            j = cls._match_numbers(cell)
+            keep = j >= (cell_matches[cell] - state.surface_size)
+            state.recent_surface[pid[keep], sid[keep], j[keep] % state.surface_size] = won[keep]
+        return state
+
+    @staticmethod
+    def _last_rate(buffer, n, w):
+        """Win rate over the last min(n, w) results stored in a ring buffer."""
+        filled = min(n, w)
+        if not filled:
+            return 0.0
+        slots = (n - 1 - np.arange(filled)) % len(buffer)
+        return int(buffer[slots].sum()) / filled
+
+    def update(self, df):
+        """
+        Pre-match features for the matches in df (appended after the current
+        state, chronologically sorted), then fold their results into the state.
+        Returns a dict of p1_/p2_ feature arrays aligned with df's rows.
+        """
+        players, won, surfaces = self._long_arrays(df, self.players)
+        self._grow(pd.unique(surfaces))
+        players = players.tolist()
+        overall = [self.window] + [w for w in self.windows if w != self.window]
+        out = {name: np.zeros(len(players)) for name in self.feature_names()}
+
+        # Both sides of a match read the state before either is updated
+        for m in range(0, len(players), 2):
+            sides = (m, m + 1)
+            for i in sides:
+                p = players[i]
+                s = self.surface_ids[surfaces[i]]
+                n = int(self.matches[p])
+                n_s = int(self.surface_matches[p, s])
+                out['win_rate_career'][i] = int(self.wins[p]) / max(n, 1)
+                out['win_rate_surface'][i] = int(self.surface_wins[p, s]) / max(n_s, 1)
+                for w in overall:
+                    out[f'win_rate_last_{w}'][i] = self._last_rate(self.recent[p], n, w)
+                for w in self.windows:
+                    out[f'win_rate_surface_last_{w}'][i] = self._last_rate(self.recent_surface[p, s], n_s, w)
+            for i in sides:
+                p = players[i]
+                s = self.surface_ids[surfaces[i]]
+                self.recent[p, self.matches[p] % self.size] = won[i]
+                if self.surface_size:
+                    self.recent_surface[p, s, self.surface_matches[p, s] % self.surface_size] = won[i]
+                self.matches[p] += 1
+                self.wins[p] += won[i]
+                self.surface_matches[p, s] += 1
+                self.surface_wins[p, s] += won[i]
+
+        # Same column order as add_features(): all p1_ columns, then p2_
+        feats = {f'p1_{name}': values[0::2] for name, values in out.items()}
+        feats.update({f'p2_{name}': values[1::2] for name, values in out.items()})
+        return feats
+
+    def player_summary(self):
+        """
+        Form of every player after their last match, keyed by name:
+        win_rate_career, win_rate_last_<window> and win_rate_surfaces
+        ({surface: win rate} over the surfaces they played on).
+        """
+        surfaces = list(self.surface_ids)
+        summary = {}
+        for name, i in self.players.ids.items():
+            p = i + 1
+            n = int(self.matches[p]) if p < len(self.matches) else 0
+            if not n:
+                continue
+            played = np.flatnonzero(self.surface_matches[p])
+            summary[name] = {
+                'win_rate_career': int(self.wins[p]) / n,
+                f'win_rate_last_{self.window}': self._last_rate(self.recent[p], n, self.window),
+                'win_rate_surfaces': {surfaces[s]: int(self.surface_wins[p, s]) / int(self.surface_matches[p, s])
+                                      for s in played.tolist()},
+            }
+        return summary
+
+    def save(self, path):
+        """Serialize the state to JSON (player rows are PlayerIndex IDs + 1, names live in the index)."""
+        state = {
+            'window': self.window,
+            'windows': list(self.windows),
+            'surfaces': list(self.surface_ids),
+            'matches': self.matches.tolist(),
+            'wins': self.wins.tolist(),
+            'surface_matches': self.surface_matches.tolist(),
+            'surface_wins': self.surface_wins.tolist(),
+            'recent': self.recent.tolist(),
+            'recent_surface': self.recent_surface.tolist(),
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, players=None):
+        """Restore a FormState saved with save(), on the PlayerIndex it was built with."""
+        with open(path) as f:
+            state = json.load(f)
+
+        form = cls(state['window'], state.get('windows', ()), players)
+        form.surface_ids = {s: i for i, s in enumerate(state['surfaces'])}
+        n_players, n_surfaces = len(state['matches']), len(form.surface_ids)
+        form.matches = np.array(state['matches'], dtype=np.int64)
+        form.wins = np.array(state['wins'], dtype=np.int64)
+        form.surface_matches = np.array(state['surface_matches'], dtype=np.int64).reshape(-1, n_surfaces)
+        form.surface_wins = np.array(state['surface_wins'], dtype=np.int64).reshape(-1, n_surfaces)
+        form.recent = np.array(state['recent'], dtype=np.int8).reshape(-1, form.size)
+        form.recent_surface = np.array(state.get('recent_surface', []), dtype=np.int8) \
+            .reshape(n_players, n_surfaces, form.surface_size)
+        return form
+
+
+def _group_start_rows(codes):
+    """For each row of a sorted code array, the row where its group begins."""
+    rows = np.arange(len(codes))
+    is_start = np.ones(len(codes), dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    return np.maximum.accumulate(np.where(is_start, rows, 0))
+
+
+def grouped_exclusive_cumcount(codes):
+    """
+    Rows before each row within its group (groupby().cumcount()).
+    codes must be sorted, or at least have each group's rows contiguous.
+    """
+    return np.arange(len(codes)) - _group_start_rows(codes)
+
+
+def grouped_exclusive_cumsum(values, codes):
+    """
+    Sum of the values before each row within its group, the current row
+    excluded (groupby().cumsum() - values, never leaking a row into its own
+    feature nor across groups). codes must have each group's rows contiguous.
+    One global cumulative sum minus its value at the group start; exact for
+    integer values.
+    """
+    before = np.cumsum(values) - values
+    return before - before[_group_start_rows(codes)]
+
+
+def window_win_rates(wins_before, matches_before, windows):
+    """
+    Win rate over each group's last w matches, for every w in windows.
+
+    Inputs are exclusive cumulative wins and match counts (results before the
+    current match), with each group's rows contiguous and chronological. The
+    wins in the last w matches are wins_before minus its value w rows earlier,
+    so every extra window is one gather and one subtraction. Rows without
+    previous matches get 0.
+    """
+    rows = np.arange(len(matches_before))
+    rates = {}
+    for w in windows:
+        lagged = np.where(matches_before >= w, wins_before[np.maximum(rows - w, 0)], 0)
+        rates[w] = (wins_before - lagged) / np.maximum(np.minimum(matches_before, w), 1)
+    return rates
+
+
+def _day_numbers(dates):
+    """Integer day numbers of a datetime column."""
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def replay_decay(keys, days, won, weights, half_life, sums, totals, last_day):
+    """
+    Exponentially time-decayed win rate over one sequence of long-format rows.
+
+    keys, days (integer day numbers), won and weights are plain lists in
+    chronological order. sums, totals and last_day are lists indexed by key,
+    updated in place: between two rows of a key both sums are multiplied by
+    0.5 ** (elapsed_days / half_life), then the row's weight is added.
+    Returns the pre-match decayed win rate and decayed match weight per row.
+    """
+    n = len(keys)
+    rate = [0.0] * n
+    mass = [0.0] * n
+
+    for i in range(n):
+        key = keys[i]
+        day = days[i]
+        decay = 0.5 ** ((day - last_day[key]) / half_life)
+        s = sums[key] * decay
+        m = totals[key] * decay
+        rate[i] = s / m if m > 0 else 0.0
+        mass[i] = m
+
+        w = weights[i]
+        sums[key] = s + w * won[i]
+        totals[key] = m + w
+        last_day[key] = day
+
+    return rate, mass
+
+
+class DecayState:
+    """
+    Per-player running state behind the time-decayed form features.
+
+    For each half-life (in days) it keeps decayed sums of wins and matches per
+    player (overall and opponent-Elo-weighted) and per (player, surface), and
+    the day each was last updated. Matches are replayed once, in order, with
+    replay_decay(); later appended matches continue from the same state.
+
+    Features per side and half-life h:
+    - win_rate_decay_<h>: decayed win rate
+    - matches_decay_<h>: decayed match count (drops while a player is inactive)
+    - win_rate_surface_decay_<h>: decayed win rate on the match surface
+    - win_rate_elo_decay_<h>: decayed win rate, each match weighted by the
+      opponent's pre-match Elo / initial rating (needs elo_p1/elo_p2)
+
+    Player keys are PlayerIndex IDs + 1 (0 collects missing players).
+    """
+
+    def __init__(self, half_lives=(), initial_rating=1500, players=None):
+        self.half_lives = tuple(half_lives)
+        self.initial_rating = initial_rating
+        self.players = players if players is not None else PlayerIndex()
+        self.cell_ids = {}  # (player key, surface) -> key of the surface variant
+        self.tracks = {}  # (variant, half_life) -> [sums, totals, last_day], lists indexed by key
+
+    @staticmethod
+    def _encode(mapping, names):
+        """IDs of names, registering unseen ones."""
+        return [mapping.setdefault(name, len(mapping)) for name in names]
+
+    def _track(self, variant, half_life, n_keys):
+        track = self.tracks.setdefault((variant, half_life), [[], [], []])
+        for values in track:
+            values.extend([0.0] * (n_keys - len(values)))
+        return track
+
+    def update(self, df):
+        """
+        Pre-match decayed features for the matches in df (appended after the
+        current state, chronologically sorted), then fold their results into
+        the state. Returns a dict of p1_/p2_ feature arrays aligned with df's rows.
+        """
+        player_keys, won, surfaces = FormState._long_arrays(df, self.players)
+        player_keys = player_keys.tolist()
+        days = np.repeat(_day_numbers(df['Date']), 2).tolist()
+        won = won.tolist()
+        cell_keys = self._encode(self.cell_ids, list(zip(player_keys, surfaces.tolist())))
+        n_players = len(self.players) + 1
+
+        ones = [1.0] * len(won)
+        variants = [('win_rate_decay', player_keys, ones, n_players),
+                    ('win_rate_surface_decay', cell_keys, ones, len(self.cell_ids))]
+        if 'elo_p1' in df.columns:
+            opponent = np.column_stack([df['elo_p2'].to_numpy(), df['elo_p1'].to_numpy()]).ravel()
+            variants.append(('win_rate_elo_decay', player_keys, (opponent / self.initial_rating).tolist(),
+                             n_players))
+
+        feats = {}
+        for h in self.half_lives:
+            for name, keys, weights, n_keys in variants:
+                sums, totals, last_day = self._track(name, h, n_keys)
+                rate, mass = replay_decay(keys, days, won, weights, h, sums, totals, last_day)
+                outputs = [(f'{name}_{h}', rate)]
+                if name == 'win_rate_decay':
+                    outputs.append((f'matches_decay_{h}', mass))
+                for col, values in outputs:
+                    values = np.array(values)
+                    feats[f'p1_{col}'] = values[0::2]
+                    feats[f'p2_{col}'] = values[1::2]
+        return feats
+
+    def save(self, path):
+        """Serialize the state to JSON (player keys are PlayerIndex IDs + 1, names live in the index)."""
+        state = {
+            'half_lives': list(self.half_lives),
+            'initial_rating': self.initial_rating,
+            'cells': [list(cell) for cell in self.cell_ids],
+            'tracks': [{'variant': variant, 'half_life': h, 'values': values}
+                       for (variant, h), values in self.tracks.items()],
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, players=None):
+        """Restore a DecayState saved with save(), on the PlayerIndex it was built with."""
+        with open(path) as f:
+            state = json.load(f)
+
+        decay = cls(state['half_lives'], state['initial_rating'], players)
+        decay.cell_ids = {tuple(cell): i for i, cell in enumerate(state['cells'])}
+        decay.tracks = {(t['variant'], t['half_life']): t['values'] for t in state['tracks']}
+        return decay
+
+
+def schedule_features(df, windows=(7, 14, 30), tournament_span=21):
+    """
+    Schedule/fatigue features from per-player sorted date arrays.
+
+    The long-format rows (P1 before P2, match by match) are stably sorted by
+    player, so each player's days form one sorted run of the composite key
+    player * stride + day. One np.searchsorted per window then finds, for
+    every row at once, the player's first match inside the window; the count
+    is the distance to the row. Matches already played in the current
+    tournament use the same search on (player, tournament) runs, within
+    tournament_span days. df must be chronologically sorted.
+
+    Returns a dict of p1_/p2_ arrays: matches_last_<w>d, days_since_last_match
+    (NaN before a first match) and tournament_matches (if 'Tournament' exists).
+    Players are grouped by their interned p1_id / p2_id when present.
+    """
+    n = 2 * len(df)
+    days = np.repeat(_day_numbers(df['Date']), 2)
+    if n:
+        # Shift so that day - window never reaches into the previous player's run
+        days = days - days.min() + max(max(windows, default=0), tournament_span) + 1
+    stride = int(days.max(initial=0)) + 1
+    rows = np.arange(n)
+
+    def runs(codes):
+        """Sorted composite keys, sort order and row positions for groups of codes."""
+        order = np.argsort(codes, kind='stable')
+        return codes[order] * stride + days[order], order
+
+    def counts_within(keys, span):
+        return rows - np.searchsorted(keys, keys - span, side='right')
+
+    out = {}
+
+    def scatter(name, order, values):
+        full = np.empty(n, dtype=float)
+        full[order] = values
+        out[name] = full
+
+    if 'p1_id' in df.columns:
+        player_code = np.column_stack([df['p1_id'].to_numpy(np.int64), df['p2_id'].to_numpy(np.int64)]).ravel() + 1
+    else:
+        players = np.column_stack([df['Player_1'].to_numpy(dtype=object),
+                                   df['Player_2'].to_numpy(dtype=object)]).ravel()
+        player_code = pd.factorize(players)[0]
+    keys, order = runs(player_code)
+    for w in windows:
+        scatter(f'matches_last_{w}d', order, counts_within(keys, w))
+    same_player = np.r_[False, keys[1:] // stride == keys[:-1] // stride]
+    gap = np.r_[np.nan, np.diff(keys).astype(float)]
+    scatter('days_since_last_match', order, np.where(same_player, gap, np.nan))
+
+    if 'Tournament' in df.columns:
+        tournament_code, tournaments = pd.factorize(np.repeat(df['Tournament'].to_numpy(dtype=object), 2))
+        keys, order = runs(player_code * (len(tournaments) + 1) + tournament_code + 1)
+        scatter('tournament_matches', order, counts_within(keys, tournament_span))
+
+    feats = {}
+    for name, values in out.items():
+        feats[f'p1_{name}'] = values[0::2]
+        feats[f'p2_{name}'] = values[1::2]
+    return feats
+
+
+class ScheduleState:
+    """
+    Recent matches needed to continue schedule_features() on appended
+    matches: every match within the largest window (or tournament span) of
+    the last date seen, plus each player's last match day (for
+    days_since_last_match beyond the tail). update() computes the features
+    of new matches over this tail plus the new rows, the same code path as a
+    full run. Players are PlayerIndex IDs.
+    """
+
+    COLUMNS = ['Date', 'Tournament', 'p1_id', 'p2_id']
+
+    def __init__(self, windows=(7, 14, 30), tournament_span=21, players=None):
+        self.windows = tuple(windows)
+        self.tournament_span = tournament_span
+        self.players = players if players is not None else PlayerIndex()
+        self.tail = pd.DataFrame(columns=self.COLUMNS)
+        self.last_day = {}  # player ID -> day number of their last match
+
+    def update(self, df):
+        """Schedule features for the matches in df (appended after the tail), then roll the tail forward."""
+        p1, p2 = player_ids(df, self.players)
+        new = pd.DataFrame({'Date': df['Date'].to_numpy(), 'p1_id': p1, 'p2_id': p2})
+        cols = ['Date', 'p1_id', 'p2_id']
+        if 'Tournament' in df.columns:
+            new['Tournament'] = df['Tournament'].to_numpy(dtype=object)
+            cols.append('Tournament')
+        frame = pd.concat([self.tail[cols], new[cols]], ignore_index=True) if len(self.tail) else new[cols]
+        feats = schedule_features(frame, self.windows, self.tournament_span)
+        feats = {name: values[len(frame) - len(df):] for name, values in feats.items()}
+
+        # Players absent from the tail: last match from the per-player days
+        days = _day_numbers(df['Date'])
+        for side, ids in (('p1', p1), ('p2', p2)):
+            since = feats[f'{side}_days_since_last_match']
+            missing = np.flatnonzero(np.isnan(since))
+            since[missing] = [days[i] - self.last_day.get(ids[i], np.nan) for i in missing]
+        for a, b, day in zip(p1.tolist(), p2.tolist(), days.tolist()):
+            self.last_day[a] = self.last_day[b] = int(day)
+
+        if len(frame):
+            horizon = max(max(self.windows, default=0), self.tournament_span)
+            recent = frame['Date'] > frame['Date'].max() - pd.Timedelta(days=horizon)
+            self.tail = frame[recent].reset_index(drop=True)
+        return feats
+
+    def save(self, path):
+        """Serialize the state to JSON."""
+        tail = self.tail.assign(Date=self.tail['Date'].astype(str))
+        state = {'windows': list(self.windows), 'tournament_span': self.tournament_span,
+                 'tail': tail.to_dict(orient='list'), 'last_day': self.last_day}
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, players=None):
+        """Restore a ScheduleState saved with save(), on the PlayerIndex it was built with."""
+        with open(path) as f:
+            state = json.load(f)
+
+        schedule = cls(state['windows'], state['tournament_span'], players)
+        schedule.last_day = {int(player): day for player, day in state['last_day'].items()}
+        tail = pd.DataFrame(state['tail'])
+        if len(tail):
+            tail['Date'] = pd.to_datetime(tail['Date'])
+            schedule.tail = tail
+        return schedule
+
+
+class HeadToHead:
+    """
+    Pair-keyed head-to-head index, filled in one chronological pass.
+
+    Keys are ordered PlayerIndex ID pairs (lower ID first), so both orientations of
+    a matchup share one entry: [wins of the lower ID, wins of the higher ID,
+    day of the last meeting], plus per-surface win counts keyed by
+    (lower ID, higher ID, surface). lookup() answers any matchup in O(1).
+
+    Pre-match features per row, from Player_1's side:
+    h2h_matches, h2h_p1_wins, h2h_p2_wins, h2h_win_rate_p1 (0.5 before a first
+    meeting), h2h_surface_matches, h2h_surface_p1_wins and h2h_days_since_last
+    (NaN before a first meeting).
+    """
+
+    FEATURES = ['h2h_matches', 'h2h_p1_wins', 'h2h_p2_wins', 'h2h_win_rate_p1',
+                'h2h_surface_matches', 'h2h_surface_p1_wins', 'h2h_days_since_last']
+
+    def __init__(self, players=None):
+        self.players = players if players is not None else PlayerIndex()
+        self.pairs = {}  # (lo, hi) -> [lo_wins, hi_wins, last_day]
+        self.surface_pairs = {}  # (lo, hi, surface) -> [lo_wins, hi_wins]
+
+    def update(self, df):
+        """
+        Pre-match H2H features for the matches in df (appended after the
+        current index, chronologically sorted), then record their results.
+        Returns a dict of feature arrays aligned with df's rows.
+        """
+        p1, p2 = player_ids(df, self.players)
+        p1, p2 = p1.tolist(), p2.tolist()
+        p1_won = (df['Winner'] == df['Player_1']).to_numpy().tolist()
+        surfaces = df['Surface'].to_numpy(dtype=object).tolist()
+        days = _day_numbers(df['Date']).tolist()
+
+        n = len(p1)
+        out = {name: np.zeros(n) for name in self.FEATURES}
+        matches, p1_wins, p2_wins = out['h2h_matches'], out['h2h_p1_wins'], out['h2h_p2_wins']
+        surface_matches, surface_p1_wins = out['h2h_surface_matches'], out['h2h_surface_p1_wins']
+        since_last = out['h2h_days_since_last']
+
+        for i in range(n):
+            a, b = p1[i], p2[i]
+            lo_first = a < b
+            key = (a, b) if lo_first else (b, a)
+            pair = self.pairs.get(key)
+            if pair is None:
+                pair = self.pairs[key] = [0, 0, None]
+            cell = self.surface_pairs.get(key + (surfaces[i],))
+            if cell is None:
+                cell = self.surface_pairs[key + (surfaces[i],)] = [0, 0]
+
+            # Pre-match counts, oriented to Player_1
+            a_slot = 0 if lo_first else 1
+            p1_wins[i] = pair[a_slot]
+            p2_wins[i] = pair[1 - a_slot]
+            matches[i] = pair[0] + pair[1]
+            surface_p1_wins[i] = cell[a_slot]
+            surface_matches[i] = cell[0] + cell[1]
+            since_last[i] = np.nan if pair[2] is None else days[i] - pair[2]
+
+            winner_slot = a_slot if p1_won[i] else 1 - a_slot
+            pair[winner_slot] += 1
+            pair[2] = days[i]
+            cell[winner_slot] += 1
+
+        out['h2h_win_rate_p1'] = np.where(matches > 0, p1_wins / np.maximum(matches, 1), 0.5)
+        return out
+
+    def lookup(self, player_a, player_b, surface=None):
+        """
+        Head-to-head record of player_a against player_b (any order), from
+        player_a's side. With surface, also the record on that surface.
+        """
+        a = self.players.id(player_a)
+        b = self.players.id(player_b)
+        record = {'matches': 0, 'wins': 0, 'losses': 0, 'last_meeting': None}
+        if a < 0 or b < 0 or a == b:
+            return record
+
+        key = (a, b) if a < b else (b, a)
+        a_slot = 0 if a < b else 1
+        pair = self.pairs.get(key)
+        if pair is not None:
+            record.update(matches=pair[0] + pair[1], wins=pair[a_slot], losses=pair[1 - a_slot],
+                          last_meeting=str(np.datetime64(pair[2], 'D')))
+        if surface is not None:
+            cell = self.surface_pairs.get(key + (surface,), [0, 0])
+            record['surface_wins'] = cell[a_slot]
+            record['surface_losses'] = cell[1 - a_slot]
+        return record
+
+    def save(self, path):
+        """
+        Serialize the index to JSON. The player names of the PlayerIndex are
+        included (ID = position), so the file is usable on its own (service).
+        """
+        state = {
+            'players': self.players.names,
+            'pairs': [[lo, hi] + values for (lo, hi), values in self.pairs.items()],
+            'surface_pairs': [list(key) + values for key, values in self.surface_pairs.items()],
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, players=None):
+        """
+        Restore an index saved with save(), on the given PlayerIndex (the one
+        it was built with) or on one rebuilt from the saved names.
+        """
+        with open(path) as f:
+            state = json.load(f)
+
+        h2h = cls(players if players is not None else PlayerIndex.from_names(state['players']))
+        h2h.pairs = {(lo, hi): [lo_wins, hi_wins, last_day]
+                     for lo, hi, lo_wins, hi_wins, last_day in state['pairs']}
+        h2h.surface_pairs = {(lo, hi, surface): [lo_wins, hi_wins]
+                             for lo, hi, surface, lo_wins, hi_wins in state['surface_pairs']}
+        return h2h
+
+
+# One set: "6-4", or "7-6(5)" with the tiebreak loser's points
+SET_PATTERN = r'(?P<g1>\d+)-(?P<g2>\d+)(?:\((?P<tb>\d+)\))?'
+
+
+def _extract_sets(scores):
+    """
+    All sets of all scores as flat arrays (row position, g1, g2, has_tiebreak_points).
+    Uses pyarrow compute kernels when available, pandas extractall otherwise.
+    """
+    if HAS_PYARROW:
+        arr = pa.array(scores.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+        tokens = pc.split_pattern(arr, ' ')
+        parents = pc.list_parent_indices(tokens)
+        sets = pc.extract_regex(pc.list_flatten(tokens), '^' + SET_PATTERN + '$')
+        valid = sets.is_valid()
+        sets = sets.filter(valid)
+        pos = parents.filter(valid).to_numpy()
+        g1 = pc.cast(sets.field('g1'), pa.int64()).to_numpy()
+        g2 = pc.cast(sets.field('g2'), pa.int64()).to_numpy()
+        # Unmatched optional groups come back as empty strings
+        tb = pc.greater(pc.utf8_length(sets.field('tb')), 0).to_numpy(zero_copy_only=False)
+        return pos, g1, g2, tb
+
+    sets = scores.astype('string').str.extractall(SET_PATTERN)
+    pos = scores.index.get_indexer(sets.index.get_level_values(0))
+    return (pos, sets['g1'].to_numpy(dtype=np.int64), sets['g2'].to_numpy(dtype=np.int64),
+            sets['tb'].notna().to_numpy())
+
+
+def parse_score_column(scores):
+    """
+    Vectorized parse of a Score column ("7-6 2-6 1-6", games from Player_1's side).
+
+    Whole-column string operations only (split + regex extract per set token,
+    two contains() for the flags), then np.bincount aggregates sets per match.
+    Returns a frame aligned with `scores` with compact integer columns:
+    sets_played, p1_sets, p2_sets, p1_games, p2_games, tiebreaks,
+    p1_bagels, p2_bagels (sets won 6-0), retired, walkover.
+    """
+    n = len(scores)
+    pos, g1, g2, tb = _extract_sets(scores)
+    is_tiebreak = ((g1 == 7) & (g2 == 6)) | ((g1 == 6) & (g2 == 7)) | tb
+
+    def per_match(weights):
+        return np.bincount(pos, weights=weights, minlength=n)
+
+    text = scores.astype('string')
+    out = pd.DataFrame(index=scores.index)
+    out['sets_played'] = np.bincount(pos, minlength=n).astype(np.int8)
+    out['p1_sets'] = per_match(g1 > g2).astype(np.int8)
+    out['p2_sets'] = per_match(g2 > g1).astype(np.int8)
+    out['p1_games'] = per_match(g1).astype(np.int16)
+    out['p2_games'] = per_match(g2).astype(np.int16)
+    out['tiebreaks'] = per_match(is_tiebreak).astype(np.int8)
+    out['p1_bagels'] = per_match((g1 == 6) & (g2 == 0)).astype(np.int8)
+    out['p2_bagels'] = per_match((g1 == 0) & (g2 == 6)).astype(np.int8)
+    out['retired'] = text.str.contains(r'ret|def', case=False).fillna(False).to_numpy(dtype=np.int8)
+    out['walkover'] = text.str.contains(r'w/o|walkover', case=False).fillna(False).to_numpy(dtype=np.int8)
+    return out
@@ -0,0 +1,32 @@
+import argparse
+import os
+from src.preprocessing import TennisPreprocessor
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply newly appended matches to the Elo checkpoint.")
+    parser.add_argument('--data', default='atp_tennis.csv')
+    parser.add_argument('--checkpoint', default='models/elo_checkpoint.json')
+    parser.add_argument('--out', default='data/processed/new_matches.csv')
+    args = parser.parse_args()
+
+    processor = TennisPreprocessor()
+
+    if not os.path.exists(args.checkpoint):
+        # First run: full replay to build the checkpoint
+        print("No checkpoint found, replaying full history...")
+        processor.load_data(args.data)
+        processor.process()
+        os.makedirs(os.path.dirname(args.checkpoint) or '.', exist_ok=True)
+        processor.save_checkpoint(args.checkpoint)
+        print(f"Saved Elo checkpoint to {args.checkpoint}")
+        return
+
+    new_df = processor.ingest_new_matches(args.data, args.checkpoint)
+
+    if not new_df.empty:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        new_df.to_csv(args.out, index=False)
+        print(f"Saved {len(new_df)} new feature rows to {args.out}")
+
+if __name__ == "__main__":
+    main()
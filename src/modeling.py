@@ -0,0 +1,228 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+from joblib import dump
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from threadpoolctl import threadpool_limits
+
+try:
+    from xgboost import XGBClassifier
+    HAS_XGBOOST = True
+except ImportError:
+    HAS_XGBOOST = False
+
+# V2 model inputs: engineered features + some original ones
+NUMERICAL_COLS = [
+    # Elo
+    'elo_p1', 'elo_p2', 'elo_prob_p1', 'elo_prob_p2',
+    'elo_surf_p1', 'elo_surf_p2',
+    # Form / History
+    'p1_win_rate_career', 'p1_win_rate_last_10', 'p1_win_rate_surface',
+    'p2_win_rate_career', 'p2_win_rate_last_10', 'p2_win_rate_surface',
+    # Raw Stats (still useful)
+    'Rank_1', 'Rank_2', 'Pts_1', 'Pts_2', 'Odd_1', 'Odd_2', 'Best of'
+]
+CATEGORICAL_COLS = ['Series', 'Court', 'Surface', 'Round']
+
+# Classifiers that fit with several threads (n_jobs); the others use one core
+MULTITHREADED = ('RandomForestClassifier', 'XGBClassifier')
+
+
+def build_preprocessor(numerical_cols=NUMERICAL_COLS, categorical_cols=CATEGORICAL_COLS):
+    """
+    Median impute + scale the numerical columns, one-hot the categorical ones.
+    Columns are names (DataFrame input) or positions (array input).
+    """
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),  # Handle any remaining NaNs
+        ('scaler', StandardScaler())
+    ])
+
+    categorical_transformer = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+
+    return ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, numerical_cols),
+            ('cat', categorical_transformer, categorical_cols)
+        ]
+    )
+
+
+def build_models(seed=42):
+    """The four V2 classifiers, unfitted. XGBoost is skipped when it is not installed."""
+    models = {
+        'LogisticRegression_v2': LogisticRegression(random_state=seed, max_iter=1000),
+        'DecisionTree_v2': DecisionTreeClassifier(random_state=seed, max_depth=10),
+        'RandomForest_v2': RandomForestClassifier(random_state=seed, n_estimators=100, max_depth=15),
+    }
+    if HAS_XGBOOST:
+        models['XGBoost_v2'] = XGBClassifier(
+            n_estimators=500,
+            learning_rate=0.05,
+            max_depth=6,
+            random_state=seed,
+            use_label_encoder=False,
+            eval_metric='logloss'
+        )
+    else:
+        print("xgboost is not installed: skipping XGBoost_v2.")
+    return models
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_budgets(models, n_cores=None):
+    """
+    Threads per model when all of them are fitted at once: single-threaded
+    models get one core each, the multithreaded ones (RandomForest, XGBoost)
+    share the remaining cores, at least one each.
+    """
+    n_cores = n_cores or available_cores()
+    threaded = [name for name, model in models.items() if type(model).__name__ in MULTITHREADED]
+    spare = n_cores - (len(models) - len(threaded))
+
+    budgets = {name: 1 for name in models}
+    for i, name in enumerate(threaded):
+        budgets[name] = max(1, spare // len(threaded) + (i < spare % len(threaded)))
+    return budgets
+
+
+def peak_rss_mb():
+    """
+    Peak RSS of this process in MB: VmHWM from /proc/self/status. Not
+    getrusage()'s ru_maxrss, which a spawned child inherits from its parent
+    across exec (a worker would report the parent's peak). Falls back to
+    ru_maxrss where /proc is unavailable.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024  # kB
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def write_design_matrix(preprocessor, X, path, chunk_size=50_000):
+    """
+    Transform X with a fitted preprocessor straight into a float32 .npy file,
+    chunk_size rows at a time (no full float64 copy), and return it
+    memory-mapped read-only.
+    """
+    n_features = preprocessor.transform(X.iloc[:1]).shape[1]
+    design = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(X), n_features))
+    for start in range(0, len(X), chunk_size):
+        design[start:start + chunk_size] = preprocessor.transform(X.iloc[start:start + chunk_size])
+    design.flush()
+    del design
+    return np.load(path, mmap_mode='r')
+
+
+def _fit_and_export(name, pipeline, threads, X_train, y_train, X_test, y_test, model_path):
+    """
+    Worker: fit, score and dump one pipeline within its thread budget; returns
+    its resource usage. With paths of a shared design matrix as X_train / X_test,
+    the preprocessor is already fitted: only the classifier is trained, on the
+    memory-mapped matrix, and the dumped pipeline bundles both.
+    """
+    baseline = peak_rss_mb()
+    classifier = pipeline.named_steps['classifier']
+    if type(classifier).__name__ in MULTITHREADED:
+        classifier.set_params(n_jobs=threads)
+
+    estimator = pipeline
+    if isinstance(X_train, str):
+        X_train, X_test = np.load(X_train, mmap_mode='r'), np.load(X_test, mmap_mode='r')
+        estimator = classifier
+
+    # BLAS / OpenMP pools follow the budget too
+    with threadpool_limits(limits=threads):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        estimator.fit(X_train, y_train)
+        wall_seconds, cpu_seconds = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+        train_score = estimator.score(X_train, y_train)
+        test_score = estimator.score(X_test, y_test)
+
+    dump(pipeline, model_path)
+    peak = peak_rss_mb()
+    return name, {
+        'train_acc': train_score,
+        'test_acc': test_score,
+        'threads': threads,
+        'wall_seconds': wall_seconds,
+        'cpu_seconds': cpu_seconds,
+        'peak_rss_mb': peak,
+        'fit_peak_increase_mb': peak - baseline,
+    }
+
+
+def _fit_task(args):
+    return _fit_and_export(*args)
+
+
+def fit_concurrently(pipelines, X_train, y_train, X_test, y_test, model_paths, n_cores=None,
+                     shared_design=False, design_dir=None):
+    """
+    Fit independent pipelines at the same time, each in its own fresh worker
+    process with the thread budget of thread_budgets(), and dump each one
+    to model_paths[name]. Fresh processes make each model's CPU time and
+    peak RSS its own. Returns {name: resource usage and scores}.
+
+    shared_design: the pipelines share one preprocessor configuration; fit
+    it once, write the train / test design matrices as float32 .npy files
+    (in design_dir, or a temporary directory) and train every classifier on
+    them memory-mapped. Each exported pipeline still bundles the fitted
+    preprocessor, so it predicts from raw feature frames as before.
+    """
+    if shared_design:
+        with tempfile.TemporaryDirectory() as tmp:
+            design_dir = design_dir or tmp
+            os.makedirs(design_dir, exist_ok=True)
+            preprocessor = clone(next(iter(pipelines.values())).named_steps['preprocessor']).fit(X_train)
+            train_path, test_path = os.path.join(design_dir, 'train.npy'), os.path.join(design_dir, 'test.npy')
+            design = write_design_matrix(preprocessor, X_train, train_path)
+            write_design_matrix(preprocessor, X_test, test_path)
+            print(f"Shared design matrix: {design.shape[0]} x {design.shape[1]} float32 ({design.nbytes / 1e6:.1f}MB)")
+            del design
+
+            pipelines = {
+                name: Pipeline(steps=[('preprocessor', preprocessor), ('classifier', p.named_steps['classifier'])])
+                for name, p in pipelines.items()
+            }
+            return fit_concurrently(pipelines, train_path, np.asarray(y_train), test_path, np.asarray(y_test),
+                                    model_paths, n_cores=n_cores)
+
+    n_cores = n_cores or available_cores()
+    budgets = thread_budgets({name: p.named_steps['classifier'] for name, p in pipelines.items()}, n_cores)
+    # Longest (multithreaded) fits start first
+    order = sorted(pipelines, key=lambda name: -budgets[name])
+
+    results = {}
+    tasks = [(name, pipelines[name], budgets[name], X_train, y_train, X_test, y_test, model_paths[name])
+             for name in order]
+    # maxtasksperchild=1: a fresh spawned process per model (Pool, not
+    # ProcessPoolExecutor(max_tasks_per_child=...), which needs Python 3.11)
+    with multiprocessing.get_context('spawn').Pool(min(len(pipelines), n_cores), maxtasksperchild=1) as pool:
+        for name, usage in pool.imap_unordered(_fit_task, tasks):
+            print(f"{name}: {usage['wall_seconds']:.1f}s wall, {usage['cpu_seconds']:.1f}s CPU, "
+                  f"{usage['threads']} thread(s), peak {usage['peak_rss_mb']:.0f}MB")
+            results[name] = usage
+    return results
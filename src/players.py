@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class PlayerIndex:
+    """
+    Persistent player dictionary: name <-> dense int32 ID, with aliases.
+
+    IDs are assigned once, in registration order, and never change, so arrays
+    indexed by ID stay valid as new players are added. Aliases (alternative
+    spellings of a name) resolve to the ID of their canonical name.
+    Filled by TennisPreprocessor.intern_players() and saved with the checkpoint;
+    the per-player feature states key on its IDs (see player_ids).
+    """
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.aliases = {}  # alias -> canonical name
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.canonical(name) in self.ids
+
+    def canonical(self, name):
+        return self.aliases.get(name, name)
+
+    def canonicalize(self, values):
+        """Series of names with aliases replaced by their canonical names."""
+        if not self.aliases:
+            return values
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.astype(object).replace(self.aliases).astype('category')
+        return values.replace(self.aliases)
+
+    def add(self, names):
+        """Register unseen names (aliases resolved), in sorted order for reproducible IDs."""
+        new = sorted({self.canonical(n) for n in names if isinstance(n, str)} - self.ids.keys())
+        for name in new:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self
+
+    def add_alias(self, alias, name):
+        """Make alias resolve to name (registered if needed)."""
+        name = self.canonical(name)
+        self.add([name])
+        self.aliases[alias] = name
+
+    def id(self, name, default=-1):
+        """ID of a player name or alias, default if unknown."""
+        return self.ids.get(self.canonical(name), default)
+
+    def encode(self, values):
+        """Vectorized name -> int32 ID for a Series of names (unknown or missing -> -1)."""
+        return pd.Index(self.names).get_indexer(self.canonicalize(values)).astype(np.int32)
+
+    def decode(self, ids):
+        """Names of an array of IDs."""
+        return np.asarray(self.names, dtype=object)[np.asarray(ids)]
+
+    def save(self, path):
+        """Serialize the index to JSON."""
+        with open(path, 'w') as f:
+            json.dump({'names': self.names, 'aliases': self.aliases}, f)
+
+    @classmethod
+    def from_names(cls, names, aliases=None):
+        """Index with the given names at IDs 0, 1, ... (in that order)."""
+        index = cls()
+        index.names = list(names)
+        index.ids = {name: i for i, name in enumerate(index.names)}
+        index.aliases = dict(aliases or {})
+        return index
+
+    @classmethod
+    def load(cls, path):
+        """Restore an index saved with save()."""
+        with open(path) as f:
+            state = json.load(f)
+        return cls.from_names(state['names'], state['aliases'])
+
+
+def player_ids(df, players):
+    """
+    PlayerIndex IDs of Player_1 and Player_2 as int64 arrays (-1 if missing):
+    the interned p1_id / p2_id columns when present, else encoded from the
+    names, registering unseen ones in players.
+    """
+    if 'p1_id' in df.columns:
+        return df['p1_id'].to_numpy(np.int64), df['p2_id'].to_numpy(np.int64)
+    players.add(pd.unique(pd.concat([df['Player_1'], df['Player_2']], ignore_index=True)))
+    return (players.encode(df['Player_1']).astype(np.int64),
+            players.encode(df['Player_2']).astype(np.int64))
@@ -1,6 +1,20 @@
+import json
+import os
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
+import src.data_io
+import src.elo
+import src.features
+import src.players
+from src.data_io import (CACHE_DIR, FEATURES_DIR, FrameWriter, apply_lean_schema, cache_entry, cache_key,
+                         code_fingerprint, read_cached_frame, read_match_chunks, read_matches,
+                         share_player_categories, write_cached_frame)
+from src.features import (DecayState, FormState, HeadToHead, ScheduleState, grouped_exclusive_cumcount,
+                          grouped_exclusive_cumsum, parse_score_column, window_win_rates)
+from src.elo import ArrayEloEngine, MultiTrackEloEngine, PeriodEloEngine, RatingHistory, sweep_elo
+from src.players import PlayerIndex
+from src.splits import DateIndex, WalkForwardSplit
 
 class EloSystem:
     def __init__(self, k_factor=20, initial_rating=1500):
@@ -8,6 +22,9 @@ class EloSystem:
         self.initial_rating = initial_rating
         self.ratings = {}  # Global ratings: {player_name: rating}
         self.surface_ratings = {} # {surface: {player_name: rating}}
+        # Checkpoint position: last processed match date and its row ID in the source CSV
+        self.last_match_date = None
+        self.last_match_id = -1
 
     def get_rating(self, player, surface=None):
         """Get current rating for a player. Returns initial_rating if new."""
@@ -58,26 +75,134 @@ class EloSystem:
             self.surface_ratings[surface][winner] = w_surf + self.k_factor * (1 - exp_w_surf)
             self.surface_ratings[surface][loser] = l_surf + self.k_factor * (0 - exp_l_surf)
 
+    def save(self, path):
+        """Serialize ratings and checkpoint position to a JSON file."""
+        state = {
+            'k_factor': self.k_factor,
+            'initial_rating': self.initial_rating,
+            'last_match_date': None if self.last_match_date is None else pd.Timestamp(self.last_match_date).isoformat(),
+            'last_match_id': self.last_match_id,
+            'ratings': self.ratings,
+            'surface_ratings': self.surface_ratings,
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path):
+        """Restore an EloSystem saved with save()."""
+        with open(path) as f:
+            state = json.load(f)
+
+        elo = cls(k_factor=state['k_factor'], initial_rating=state['initial_rating'])
+        elo.ratings = state['ratings']
+        elo.surface_ratings = state['surface_ratings']
+        elo.last_match_id = state['last_match_id']
+        if state['last_match_date'] is not None:
+            elo.last_match_date = pd.Timestamp(state['last_match_date'])
+        return elo
+
+# Bump when the feature table changes in a way the code fingerprint can't see
+FEATURE_VERSION = 'v2'
+
+
 class TennisPreprocessor:
-    def __init__(self):
+    # Missing rank usually means unranked or very low rank.
+    # We impute with a low value (e.g. 2000) rather than median/mean to avoid making them look stronger.
+    FILL_VALUES = {
+        'Rank_1': 2000,
+        'Rank_2': 2000,
+        'Pts_1': 0,
+        'Pts_2': 0,
+        'Odd_1': 1.0, # Implied probability ~100% (sure thing) or ~0%?
+                      # Actually 1.0 odd means no profit.
+                      # Better to flag as missing or impute with 1.0 (neutral/no info) if we use implied prob.
+        'Odd_2': 1.0
+    }
+
+    # States saved next to the Elo checkpoint: {name: (attribute, class)}
+    COMPANION_STATES = {
+        'players': ('players', PlayerIndex),
+        'form': ('form_state', FormState),
+        'h2h': ('h2h', HeadToHead),
+        'decay': ('decay_state', DecayState),
+        'schedule': ('schedule_state', ScheduleState),
+    }
+
+    def __init__(self, k_factor=20, initial_rating=1500, form_window=10, form_windows=(), decay_half_lives=(),
+                 lean=False):
         self.raw_df = None
         self.df = None
-        self.elo_system = EloSystem()
+        # Lean mode: categorical text columns, float32 features, int8 target, no copy of raw_df
+        self.lean = lean
+        self.form_window = form_window  # Matches in the recent-form window (win_rate_last_N)
+        # Extra windows for overall and per-surface form (win_rate_last_N, win_rate_surface_last_N)
+        self.form_windows = tuple(sorted(set(form_windows)))
+        self.n_source_rows = None  # Rows read from the source CSV (for the Elo checkpoint)
+        self.players = PlayerIndex()  # Persistent name <-> int32 ID dictionary, see intern_players
+        self.elo_system = EloSystem(k_factor=k_factor, initial_rating=initial_rating)
+        self.rating_history = None  # Point-in-time Elo index, built by add_elo_features
+        self.form_state = FormState(form_window, self.form_windows, self.players)  # Per-player win-rate state, kept by add_features
+        # Half-lives (days) of the time-decayed form features, none by default
+        self.decay_half_lives = tuple(decay_half_lives)
+        self.decay_state = DecayState(self.decay_half_lives, initial_rating, self.players)  # Kept by add_decay_features
+        self.h2h = HeadToHead(self.players)  # Pair-keyed head-to-head index, kept by add_h2h_features
+        self.schedule_state = ScheduleState(players=self.players)  # Recent matches per player, kept by add_schedule_features
+        self._date_index = None  # (frame, DateIndex) shared by walk_forward_split folds
+
+    def load_data(self, path, typed=False, usecols=None):
+        """
+        Load raw data and perform initial type conversions.
 
-    def load_data(self, path):
-        """Load raw data and perform initial type conversions."""
+        typed=True uses the explicit-schema loader (src.data_io.read_matches):
+        categorical text columns, float32 odds/points, fixed date format,
+        pyarrow engine when available, and optional column pruning (usecols).
+        """
         print(f"Loading data from {path}...")
-        self.raw_df = pd.read_csv(path)
+        if typed:
+            raw_df = read_matches(path, usecols=usecols)
+        else:
+            raw_df = pd.read_csv(path, usecols=usecols)
+        self.raw_df = self._prepare_raw(raw_df)
+        self.n_source_rows = len(self.raw_df)
+        print(f"Loaded {len(self.raw_df)} matches.")
+        return self.raw_df
+
+    def load_clean_data(self, path, cache_dir=CACHE_DIR, typed=False, usecols=None):
+        """
+        Load and clean the data through the on-disk Parquet cache.
+
+        The cache entry is keyed by the source file's content hash plus the
+        cleaning parameters (FILL_VALUES, typed, usecols, lean). A hit skips both
+        CSV parsing and clean_data(); a miss runs them and stores the result,
+        replacing any stale entry for the same file.
+        """
+        params = {'fill_values': self.FILL_VALUES, 'typed': typed, 'usecols': usecols, 'lean': self.lean}
+        key = cache_key(path, params)
+        cached = read_cached_frame(cache_dir, path, key)
+
+        if cached is not None:
+            self.df, meta = cached
+            self.raw_df = None
+            self.n_source_rows = meta['n_source_rows']
+            print(f"Loaded {len(self.df)} cleaned matches from cache.")
+            return self.df
+
+        self.load_data(path, typed=typed, usecols=usecols)
+        self.clean_data()
+        self.raw_df = None  # self.df is clean: process() must not clean it again
+        write_cached_frame(cache_dir, path, key, self.df, {'n_source_rows': self.n_source_rows})
+        return self.df
 
+    def _prepare_raw(self, raw_df):
+        """Convert types and sort a freshly read CSV frame."""
         # Date conversion
-        if 'Date' in self.raw_df.columns:
-            self.raw_df['Date'] = pd.to_datetime(self.raw_df['Date'], errors='coerce')
+        if 'Date' in raw_df.columns:
+            raw_df['Date'] = pd.to_datetime(raw_df['Date'], errors='coerce')
 
         # Sort chronologically - CRITICAL for time-series
-        self.raw_df = self.raw_df.sort_values('Date').reset_index(drop=True)
-
-        print(f"Loaded {len(self.raw_df)} matches.")
-        return self.raw_df
+        # (stable: same-day matches keep their file order, chunk by chunk too)
+        return raw_df.sort_values('Date', kind='stable').reset_index(drop=True)
 
     def clean_data(self):
         """
@@ -89,26 +214,19 @@ class TennisPreprocessor:
         if self.raw_df is None:
             raise ValueError("Data not loaded. Call load_data() first.")
 
-        df = self.raw_df.copy()
+        if self.lean:
+            # The stage owns the frame: clean it in place and release raw_df
+            df, self.raw_df = self.raw_df, None
+            apply_lean_schema(df)
+        else:
+            df = self.raw_df.copy()
 
         # 1. Filter invalid dates (if any)
-        df = df.dropna(subset=['Date'])
-
-        # 2. Impute Ranks and Points
-        # Missing rank usually means unranked or very low rank.
-        # We impute with a low value (e.g. 2000) rather than median/mean to avoid making them look stronger.
-        fill_values = {
-            'Rank_1': 2000,
-            'Rank_2': 2000,
-            'Pts_1': 0,
-            'Pts_2': 0,
-            'Odd_1': 1.0, # Implied probability ~100% (sure thing) or ~0%?
-                          # Actually 1.0 odd means no profit.
-                          # Better to flag as missing or impute with 1.0 (neutral/no info) if we use implied prob.
-            'Odd_2': 1.0
-        }
+        if df['Date'].isna().any():
+            df = df.dropna(subset=['Date'])
 
-        for col, val in fill_values.items():
+        # 2. Impute Ranks and Points (see FILL_VALUES)
+        for col, val in self.FILL_VALUES.items():
             if col in df.columns:
                 # Replace -1 (common placeholder) and NaN
                 df[col] = df[col].replace(-1, np.nan).fillna(val)
@@ -118,32 +236,114 @@ class TennisPreprocessor:
         # For now, we assume the dataset is relatively clean based on previous inspection,
         # but we can force title case.
         if 'Surface' in df.columns:
-            df['Surface'] = df['Surface'].str.title()
+            titled = df['Surface'].str.title()
+            if isinstance(df['Surface'].dtype, pd.CategoricalDtype):
+                titled = titled.astype('category')
+            df['Surface'] = titled
 
         self.df = df
         print("Data cleaning completed.")
         return self.df
 
+    def intern_players(self):
+        """
+        Resolve player aliases and add int32 ID columns p1_id / p2_id from
+        self.players, registering unseen names. IDs persist with the
+        checkpoint; the feature stages group and index on them instead of
+        hashing and comparing name strings.
+        """
+        if self.df is None:
+            return
+
+        df = self.df
+        if self.players.aliases:
+            for col in [c for c in ['Player_1', 'Player_2', 'Winner'] if c in df.columns]:
+                df[col] = self.players.canonicalize(df[col])
+            if self.lean:
+                share_player_categories(df)
+        for col in ['Player_1', 'Player_2']:
+            names = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].unique()
+            self.players.add(names)
+        df['p1_id'] = self.players.encode(df['Player_1'])
+        df['p2_id'] = self.players.encode(df['Player_2'])
+        return self.df
+
     def parse_scores(self):
         """
         Parse the 'Score' column to extract:
-        - Total sets played
-        - Total games played
-        - Retirement flag
+        - Sets and games won by each side, tiebreaks, 6-0 sets
+        - Retirement and walkover flags
+
+        These describe the match itself, so they are not pre-match features:
+        process() does not call this. Use them for targets or for
+        per-player history (lagged like the form features).
         """
-        # TODO: Implement complex score parsing if needed for "Dominance" features
-        pass
+        if 'Score' not in self.df.columns:
+            print("No 'Score' column, skipping score parsing.")
+            return self.df
+
+        print("Parsing scores...")
+        scores = parse_score_column(self.df['Score'])
+        for col in scores.columns:
+            self.df[col] = scores[col]
+        return self.df
 
-    def add_elo_features(self):
+    def add_elo_features(self, engine='array', tracks=None, n_jobs=1, period='W', history=True):
         """
         Calculate and add Elo ratings (Global and Surface) for each match.
         CRITICAL: Must be done chronologically to avoid leakage.
+
+        engine:
+        - 'array': integer-encoded replay over flat rating arrays (fast, default).
+        - 'iterrows': the original row-by-row loop over EloSystem (reference).
+          Both produce bit-for-bit identical elo_* columns.
+        - 'multitrack': MultiTrackEloEngine over `tracks`, e.g.
+          [('elo', None), ('elo_surf', 'Surface'), ('elo_court', 'Court')],
+          adding f'{name}_p1' / f'{name}_p2' columns per track.
+        - 'period': PeriodEloEngine, batch updates per rating period ('D', 'W',
+          'M', ...). Features only use ratings from before the match's period.
+
+        n_jobs > 1 (array engine): partition matches by Surface and replay each
+        surface track in a worker process; results are merged back in order.
+
+        history=False skips building the RatingHistory index.
         """
         if self.df is None:
             return
 
         print("Calculating Elo ratings...")
 
+        if engine == 'array':
+            array_engine = ArrayEloEngine(self.elo_system.k_factor, self.elo_system.initial_rating)
+            self._add_columns(array_engine.run(self.df, elo_system=self.elo_system, n_jobs=n_jobs,
+                                               names=self.players.names))
+        elif engine == 'iterrows':
+            self._add_elo_features_iterrows()
+        elif engine == 'period':
+            period_engine = PeriodEloEngine(period, self.elo_system.k_factor, self.elo_system.initial_rating)
+            self._add_columns(period_engine.run(self.df, elo_system=self.elo_system))
+        elif engine == 'multitrack':
+            multi = MultiTrackEloEngine(tracks, self.elo_system.k_factor, self.elo_system.initial_rating)
+            self._add_columns(multi.run(self.df, elo_system=self.elo_system))
+            multi.write_back(self.elo_system)
+        else:
+            raise ValueError(f"Unknown Elo engine: {engine}")
+
+        # Advance the checkpoint position past every source row we consumed
+        consumed = self.n_source_rows if self.n_source_rows is not None else len(self.df)
+        self.elo_system.last_match_id += consumed
+        if len(self.df):
+            self.elo_system.last_match_date = self.df['Date'].max()
+
+        # Record every player's rating trajectory for as-of-date lookups
+        if history and 'elo_p1' in self.df.columns:
+            self.rating_history = RatingHistory.build(self.df, self.elo_system, self.players)
+
+        print("Elo ratings calculated.")
+        return self.df
+
+    def _add_elo_features_iterrows(self):
+        """Reference implementation: sequential iterrows() over EloSystem."""
         # Columns to store ratings
         elo_cols = ['elo_p1', 'elo_p2', 'elo_prob_p1', 'elo_prob_p2',
                     'elo_surf_p1', 'elo_surf_p2']
@@ -201,84 +401,209 @@ class TennisPreprocessor:
         self.df['elo_prob_p1'] = probs_p1
         self.df['elo_prob_p2'] = probs_p2
 
-        print("Elo ratings calculated.")
+    def sweep_elo_params(self, k_factors, initial_ratings=(1500,), surface_weights=(0.0,), eval_start=None):
+        """
+        Score a grid of Elo configurations (K, surface blend weight) on the
+        cleaned data in one replay. See src.elo.sweep_elo; initial_ratings
+        leaves the scores unchanged (only rating differences matter).
+        Does not modify self.df or the EloSystem.
+        """
+        if self.df is None:
+            raise ValueError("Data not cleaned. Call clean_data() first.")
+
+        n_configs = len(k_factors) * len(initial_ratings) * len(surface_weights)
+        print(f"Sweeping {n_configs} Elo configurations...")
+        return sweep_elo(self.df, k_factors, initial_ratings, surface_weights, eval_start)
+
+    def add_schedule_features(self, incremental=False):
+        """
+        Add schedule/fatigue features (see src.features.schedule_features):
+        matches in the last 7/14/30 days, days since the last match and
+        matches already played in the current tournament, computed with
+        np.searchsorted over per-player sorted date arrays.
+
+        incremental=True continues from the recent matches kept in
+        self.schedule_state instead of the full history.
+        """
+        if self.df is None:
+            return
+
+        print("Engineering schedule features...")
+        if not incremental:
+            self.schedule_state = ScheduleState(players=self.players)
+        self._add_columns(self.schedule_state.update(self.df))
+        print("Schedule features engineered.")
         return self.df
 
-    def add_features(self):
+    def add_features(self, incremental=False):
         """
         Add derived features:
-        - Recent Form (Win % last 10 matches)
+        - Recent Form (Win % last form_window matches, 10 by default)
         - Surface Win %
+        - Overall and surface form over each of form_windows (if any)
+
+        incremental=True computes the features of self.df (matches appended
+        after the current state) from the per-player running state in
+        self.form_state, without rebuilding the history. Both modes leave
+        self.form_state describing every match seen so far.
         """
         if self.df is None:
             return
 
+        if incremental:
+            print("Engineering features incrementally...")
+            self._add_columns(self.form_state.update(self.df))
+            print("Features engineered.")
+            return self.df
+
         print("Engineering features...")
-        df = self.df.copy()
+        # Positional index: Match_ID is the row position, used to scatter features back
+        df = self.df.reset_index(drop=True)
+        long_df = self._long_form(df)
+
+        # Running state so later appended matches can be featurized incrementally
+        self.form_state = FormState.from_history(df, self.form_window, self.form_windows, self.players)
+        dtype = np.float32 if self.lean else np.float64
+        self.df = self._scatter_long(df, long_df, self.form_state.feature_names(), dtype)
+        print("Features engineered.")
+        return self.df
+
+    def _add_columns(self, feats):
+        """Assign {column: values} to self.df; float features are float32 in lean mode."""
+        for col, values in feats.items():
+            if self.lean and np.asarray(values).dtype.kind == 'f':
+                values = np.asarray(values, dtype=np.float32)
+            self.df[col] = values
+
+    @staticmethod
+    def _scatter_long(df, long_df, feats, dtype=np.float64):
+        """
+        Write long-format features back as p1_/p2_ columns of df (positional
+        index), by position instead of merging on Match_ID: P1 rows of the
+        long table map to slots [0, n), P2 rows to [n, 2n).
+        """
+        n = len(df)
+        slot = long_df['Match_ID'].to_numpy() + np.where(long_df['Is_P1'].to_numpy(), 0, n)
+        values = np.empty((2 * n, len(feats)), dtype=dtype)
+        values[slot] = long_df[feats].to_numpy()
+        for side, rows in (('p1', values[:n]), ('p2', values[n:])):
+            for i, feat in enumerate(feats):
+                df[f'{side}_{feat}'] = rows[:, i]
+        return df
+
+    def add_h2h_features(self, incremental=False):
+        """
+        Add pre-match head-to-head features (see HeadToHead) from a pair-keyed
+        index filled in one chronological pass; self.h2h keeps the index for
+        O(1) matchup lookups.
+
+        incremental=True continues from self.h2h instead of replaying the history.
+        """
+        if self.df is None:
+            return
+
+        print("Engineering head-to-head features...")
+        if not incremental:
+            self.h2h = HeadToHead(self.players)
+        self._add_columns(self.h2h.update(self.df))
+        print("Head-to-head features engineered.")
+        return self.df
+
+    def add_decay_features(self, incremental=False):
+        """
+        Add exponentially time-decayed form features for each of
+        decay_half_lives (see DecayState): overall, per surface and
+        opponent-Elo-weighted win rates, plus the decayed match count.
+        Run after add_elo_features() to get the Elo-weighted variant.
+
+        incremental=True continues from self.decay_state instead of replaying
+        the history, like add_features(incremental=True).
+        """
+        if self.df is None or not self.decay_half_lives:
+            return self.df
+
+        print("Engineering decayed form features...")
+        if not incremental:
+            self.decay_state = DecayState(self.decay_half_lives, self.elo_system.initial_rating, self.players)
+        self._add_columns(self.decay_state.update(self.df))
+        print("Decayed form features engineered.")
+        return self.df
+
+    def _long_form(self, df):
+        """
+        Long-format table (one row per player per match) with the pre-match
+        form features, sorted by Player, Date, Match_ID.
+        df must have a positional index (it becomes Match_ID).
+        """
+        # Players are the interned int32 IDs when available (cheaper to sort and group than names)
+        interned = 'p1_id' in df.columns
+        p1, p2 = ('p1_id', 'p2_id') if interned else ('Player_1', 'Player_2')
 
-        # We need a long-format dataframe for player stats (one row per player per match)
         # Player 1 perspective
-        p1_df = df[['Date', 'Player_1', 'Winner', 'Surface']].rename(columns={'Player_1': 'Player'})
-        p1_df['Opponent'] = df['Player_2']
+        p1_df = df[['Date', p1, 'Surface']].rename(columns={p1: 'Player'})
+        p1_df['Opponent'] = df[p2]
         p1_df['Won'] = (df['Winner'] == df['Player_1']).astype(int)
         p1_df['Match_ID'] = df.index
         p1_df['Is_P1'] = True
 
         # Player 2 perspective
-        p2_df = df[['Date', 'Player_2', 'Winner', 'Surface']].rename(columns={'Player_2': 'Player'})
-        p2_df['Opponent'] = df['Player_1']
+        p2_df = df[['Date', p2, 'Surface']].rename(columns={p2: 'Player'})
+        p2_df['Opponent'] = df[p1]
         p2_df['Won'] = (df['Winner'] == df['Player_2']).astype(int)
         p2_df['Match_ID'] = df.index
         p2_df['Is_P1'] = False
 
         # Concatenate
-        long_df = pd.concat([p1_df, p2_df]).sort_values(['Player', 'Date'])
+        # Match_ID breaks ties between matches of a player on the same date (row order is chronological)
+        long_df = pd.concat([p1_df, p2_df]).sort_values(['Player', 'Date', 'Match_ID'])
+
+        # Group codes: the sort makes each player's rows contiguous and chronological
+        player_code = long_df['Player'].to_numpy(np.int64) if interned else pd.factorize(long_df['Player'])[0]
+        won = long_df['Won'].to_numpy()
 
         # 1. General Win Rate (Cumulative)
-        # Shift 1 to exclude current match
-        long_df['matches_played'] = long_df.groupby('Player').cumcount()
-        long_df['wins_cumulative'] = long_df.groupby('Player')['Won'].cumsum().shift(1).fillna(0)
+        # Exclusive kernels leave the current match out (within the player's group)
+        long_df['matches_played'] = grouped_exclusive_cumcount(player_code)
+        long_df['wins_cumulative'] = grouped_exclusive_cumsum(won, player_code)
         long_df['win_rate_career'] = long_df['wins_cumulative'] / long_df['matches_played'].replace(0, 1)
 
-        # 2. Recent Form (Last 10 matches)
-        # Rolling window of size 10, shift 1
-        long_df['win_rate_last_10'] = long_df.groupby('Player')['Won'].transform(
-            lambda x: x.shift(1).rolling(10, min_periods=1).mean()
-        ).fillna(0)
+        # 2. Recent Form (Last N matches, for N = form_window and each of form_windows)
+        # Offsets of the cumulative sums, one pass for all windows
+        windows = sorted({self.form_window, *self.form_windows})
+        rates = window_win_rates(long_df['wins_cumulative'].to_numpy(), long_df['matches_played'].to_numpy(), windows)
+        for w, rate in rates.items():
+            long_df[f'win_rate_last_{w}'] = rate
 
         # 3. Surface Win Rate
-        # Group by Player AND Surface
-        long_df['surface_matches'] = long_df.groupby(['Player', 'Surface']).cumcount()
-        long_df['surface_wins'] = long_df.groupby(['Player', 'Surface'])['Won'].cumsum().shift(1).fillna(0)
+        # Group by Player AND Surface: a stable sort by (player, surface) keeps
+        # each group contiguous and chronological; results are scattered back
+        # (missing surfaces, code -1, form their own group)
+        surface_code, surfaces = pd.factorize(long_df['Surface'])
+        cell = player_code * (len(surfaces) + 1) + surface_code + 1
+        order = np.argsort(cell, kind='stable')
+        cell = cell[order]
+
+        def in_long_order(values):
+            out = np.empty(len(values), dtype=values.dtype)
+            out[order] = values
+            return out
+
+        surface_matches = grouped_exclusive_cumcount(cell)
+        surface_wins = grouped_exclusive_cumsum(won[order], cell)
+        long_df['surface_matches'] = in_long_order(surface_matches)
+        long_df['surface_wins'] = in_long_order(surface_wins)
         long_df['win_rate_surface'] = long_df['surface_wins'] / long_df['surface_matches'].replace(0, 1)
 
-        # Merge back to main DF
-        # Features to merge
-        feats = ['Match_ID', 'win_rate_career', 'win_rate_last_10', 'win_rate_surface']
-
-        # Merge for P1
-        # Filter long_df for rows that originated from P1
-        p1_feats = long_df[long_df['Is_P1'] == True][feats].copy()
-        p1_feats.columns = ['Match_ID', 'p1_win_rate_career', 'p1_win_rate_last_10', 'p1_win_rate_surface']
-
-        df = df.merge(p1_feats, left_index=True, right_on='Match_ID', how='left')
-
-        # Merge for P2
-        # Filter long_df for rows that originated from P2
-        p2_feats = long_df[long_df['Is_P1'] == False][feats].copy()
-        p2_feats.columns = ['Match_ID', 'p2_win_rate_career', 'p2_win_rate_last_10', 'p2_win_rate_surface']
-
-        df = df.merge(p2_feats, on='Match_ID', how='left')
-
-        self.df = df.drop(columns=['Match_ID'], errors='ignore')
-        print("Features engineered.")
-        return self.df
+        # 4. Surface form over form_windows
+        for w, rate in window_win_rates(surface_wins, surface_matches, self.form_windows).items():
+            long_df[f'win_rate_surface_last_{w}'] = in_long_order(rate)
+        return long_df
 
     def create_target(self):
         """Create target variable y: 1 if Player_1 wins, 0 otherwise."""
         if self.df is None:
             return
-        self.df['y'] = (self.df['Winner'] == self.df['Player_1']).astype(int)
+        self.df['y'] = (self.df['Winner'] == self.df['Player_1']).astype('int8' if self.lean else int)
 
     def time_based_split(self, test_start_date='2024-01-01'):
         """
@@ -298,10 +623,210 @@ class TennisPreprocessor:
         print(f"Split data: Train ({len(train_df)}), Test ({len(test_df)})")
         return train_df, test_df
 
+    def walk_forward_split(self, first_test='2015-01-01', last_test='2024-01-01', freq='YS', window=None, gap=0):
+        """
+        Walk-forward folds over self.df: yields (train_idx, test_idx) positional
+        index arrays, one test window per period (see src.splits.WalkForwardSplit).
+        window=None trains on all earlier matches, window=n on the last n periods.
+        The sorted date index is built once per frame and shared by all folds.
+        """
+        if self.df is None:
+            return None
+
+        if self._date_index is None or self._date_index[0] is not self.df:
+            self._date_index = (self.df, DateIndex(self.df['Date']))
+        splitter = WalkForwardSplit(self._date_index[1], first_test, last_test, freq=freq, window=window, gap=gap)
+        print(f"Walk-forward split: {len(splitter)} folds ({'rolling' if window else 'expanding'} origin)")
+        return splitter
+
+    def feature_params(self):
+        """Everything besides the input data that determines the process() output."""
+        return {
+            'version': FEATURE_VERSION,
+            'code': code_fingerprint([__file__, src.elo.__file__, src.features.__file__, src.data_io.__file__,
+                                     src.players.__file__]),
+            'k_factor': self.elo_system.k_factor,
+            'initial_rating': self.elo_system.initial_rating,
+            'form_window': self.form_window,
+            'form_windows': list(self.form_windows),
+            'decay_half_lives': list(self.decay_half_lives),
+            'lean': self.lean,
+            'fill_values': self.FILL_VALUES,
+        }
+
+    def load_processed(self, path, artifact_dir=FEATURES_DIR, cache_dir=CACHE_DIR):
+        """
+        Return the process() output for `path`, reusing a materialized feature
+        table when one exists for the same input data and feature parameters.
+
+        The artifact (Parquet table + Elo checkpoint) is keyed by the source
+        content hash and feature_params(), so training, auditing and the
+        dashboard all read the same table instead of each replaying the
+        history. The Elo system, rating history and the form/H2H/decay states
+        are restored along with the table.
+        """
+        key = cache_key(path, self.feature_params())
+        cached = read_cached_frame(artifact_dir, path, key)
+        elo_path = cache_entry(artifact_dir, path, key) + '.elo.json'
+
+        if cached is not None and os.path.exists(elo_path):
+            self.df, meta = cached
+            self.raw_df = None
+            self.n_source_rows = meta['n_source_rows']
+            self.load_checkpoint(elo_path)
+            self.rating_history = RatingHistory.build(self.df, self.elo_system, self.players)
+            print(f"Loaded feature table {meta['version']} ({len(self.df)} matches) from {artifact_dir}.")
+            return self.df
+
+        self.load_clean_data(path, cache_dir=cache_dir)
+        self.process()
+        meta = {'version': FEATURE_VERSION, 'key': key, 'n_source_rows': self.n_source_rows,
+                'params': self.feature_params(), 'created_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')}
+        write_cached_frame(artifact_dir, path, key, self.df, meta)
+        if os.path.isdir(artifact_dir):
+            self.save_checkpoint(elo_path)
+        return self.df
+
     def process(self):
         """Orchestrate the full pipeline."""
-        self.clean_data()
+        # Frames restored by load_clean_data() are already clean
+        if self.raw_df is not None or self.df is None:
+            self.clean_data()
+        self.intern_players()
         self.add_elo_features()
+        self.add_schedule_features()
         self.add_features()
+        self.add_h2h_features()
+        self.add_decay_features()
         self.create_target()
         return self.df
+
+    def reset_state(self):
+        """Fresh Elo system and companion states, as before the first match."""
+        self.elo_system = EloSystem(k_factor=self.elo_system.k_factor, initial_rating=self.elo_system.initial_rating)
+        self.form_state = FormState(self.form_window, self.form_windows, self.players)
+        self.h2h = HeadToHead(self.players)
+        self.decay_state = DecayState(self.decay_half_lives, self.elo_system.initial_rating, self.players)
+        self.schedule_state = ScheduleState(players=self.players)
+        self.rating_history = None
+
+    def process_stream(self, path, out_path, chunk_size=100_000):
+        """
+        Streaming variant of process() for histories too large for memory.
+
+        Reads `path` (date-ordered) in chunks of chunk_size rows; every chunk
+        is cleaned and featurized from the Elo, form, H2H, decay and schedule
+        states carried over from the previous chunks (the incremental stages,
+        so values equal a full process()), then appended to out_path (Parquet,
+        CSV without pyarrow). Peak memory is bounded by the chunk size plus the
+        per-player state. The states are kept, so save_checkpoint() can follow.
+        Returns the number of rows written.
+        """
+        self.reset_state()
+        with FrameWriter(out_path) as writer:
+            for i, chunk in enumerate(read_match_chunks(path, chunk_size)):
+                self.raw_df = self._prepare_raw(chunk)
+                self.n_source_rows = len(chunk)
+                self.clean_data()
+                self.intern_players()
+
+                last_date = self.elo_system.last_match_date
+                if last_date is not None and (self.df['Date'] < last_date).any():
+                    raise ValueError(f"Chunk {i} has matches before {last_date}; the file must be date-ordered.")
+
+                self.add_elo_features(history=False)
+                self.add_schedule_features(incremental=True)
+                self.add_features(incremental=True)
+                self.add_h2h_features(incremental=True)
+                self.add_decay_features(incremental=True)
+                self.create_target()
+                writer.write(self.df)
+                print(f"Chunk {i}: wrote {len(self.df)} rows ({writer.rows} total).")
+
+        self.raw_df = None
+        self.df = None
+        return writer.rows
+
+    def _companion_paths(self, checkpoint_path):
+        """Files saved next to the Elo checkpoint: {state name: path}."""
+        base = os.path.splitext(str(checkpoint_path))[0]
+        return {name: f'{base}_{name}.json' for name in self.COMPANION_STATES}
+
+    def save_checkpoint(self, checkpoint_path, states=None):
+        """
+        Save the Elo checkpoint and, next to it, the companion states of
+        COMPANION_STATES (DecayState only if used). states limits which of
+        them are written.
+        """
+        if states is None:
+            states = {'players', 'form', 'h2h', 'schedule'} | ({'decay'} if self.decay_half_lives else set())
+        self.elo_system.save(checkpoint_path)
+        for name, path in self._companion_paths(checkpoint_path).items():
+            if name in states:
+                getattr(self, self.COMPANION_STATES[name][0]).save(path)
+
+    def load_checkpoint(self, checkpoint_path):
+        """
+        Restore the Elo system and whichever companion states save_checkpoint()
+        wrote next to it. Returns the set of restored state names.
+        """
+        self.elo_system = EloSystem.load(checkpoint_path)
+        restored = set()
+        for name, path in self._companion_paths(checkpoint_path).items():
+            if os.path.exists(path):
+                attr, state_cls = self.COMPANION_STATES[name]
+                # 'players' comes first: the other states key on its IDs
+                state = state_cls.load(path) if name == 'players' else state_cls.load(path, self.players)
+                setattr(self, attr, state)
+                restored.add(name)
+        if 'decay' in restored:
+            self.decay_half_lives = self.decay_state.half_lives
+        return restored
+
+    def ingest_new_matches(self, path, checkpoint_path):
+        """
+        Append-only ingestion: apply only the matches added to `path` since the
+        Elo checkpoint was saved, instead of replaying the whole history.
+
+        Loads the checkpoint, reads the rows after its last_match_id, computes
+        their pre-match Elo and (if the companion states were saved with
+        save_checkpoint) schedule, win-rate, H2H and decay features from the
+        restored states, saves the updated checkpoint and returns the feature
+        rows of the new matches.
+        """
+        restored = self.load_checkpoint(checkpoint_path)
+        last_id = self.elo_system.last_match_id
+        last_date = self.elo_system.last_match_date
+        print(f"Resuming Elo from checkpoint (last match #{last_id}, {last_date})...")
+
+        # Skip the header-less rows already consumed, keep the header line
+        new_rows = pd.read_csv(path, skiprows=range(1, last_id + 2))
+        if new_rows.empty:
+            print("No new matches to ingest.")
+            return new_rows
+
+        self.raw_df = self._prepare_raw(new_rows)
+        self.n_source_rows = len(new_rows)
+        self.clean_data()
+        self.intern_players()
+
+        # Appended matches must not predate the checkpoint, otherwise ratings would leak
+        if last_date is not None and (self.df['Date'] < last_date).any():
+            raise ValueError(
+                f"New matches predate the checkpoint ({last_date}). A full replay is required."
+            )
+
+        self.add_elo_features()
+        if 'schedule' in restored:
+            self.add_schedule_features(incremental=True)
+        if 'form' in restored:
+            self.add_features(incremental=True)
+        if 'h2h' in restored:
+            self.add_h2h_features(incremental=True)
+        if 'decay' in restored:
+            self.add_decay_features(incremental=True)
+        self.create_target()
+        self.save_checkpoint(checkpoint_path, restored | {'players'})
+
+        print(f"Ingested {len(self.df)} new matches.")
+        return self.df
@@ -6,13 +6,9 @@ def main():
     # Initialize
     processor = TennisPreprocessor()
 
-    # Load
-    print("Loading data...")
-    processor.load_data('atp_tennis.csv')
-
-    # Process
-    print("Processing data...")
-    df = processor.process()
+    # Load + Process (reuses the materialized feature table when up to date)
+    print("Loading and processing data...")
+    df = processor.load_processed('atp_tennis.csv')
 
     # Check for NaNs in critical columns
     print("\nChecking for NaNs in engineered features:")
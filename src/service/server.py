@@ -1,9 +1,11 @@
 from flask import Flask, request, jsonify
 import joblib
+import json
 import os
 import numpy as np
 
 MODEL_PATH = os.environ.get('MODEL_PATH', '/app/models/model.pkl')
+H2H_PATH = os.environ.get('H2H_PATH', '/app/models/h2h_index.json')
 
 app = Flask(__name__)
 
@@ -16,6 +18,22 @@ def load_model(path=MODEL_PATH):
 
 model = load_model()
 
+
+def load_h2h(path=H2H_PATH):
+    """Head-to-head index exported by train_v2.py (HeadToHead.save), as lookup dicts."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return {
+        'player_ids': {p: i for i, p in enumerate(state['players'])},
+        'pairs': {(lo, hi): values for lo, hi, *values in state['pairs']},
+        'surface_pairs': {(lo, hi, surface): values for lo, hi, surface, *values in state['surface_pairs']},
+    }
+
+
+h2h_index = load_h2h()
+
 # If model not found and the env var RETRAIN_IF_MISSING is set, attempt to train and export a model
 if model is None and os.environ.get('RETRAIN_IF_MISSING') == '1':
     try:
@@ -38,6 +56,31 @@ def health():
     return jsonify({'status': 'ok', 'model_loaded': model is not None})
 
 
+@app.route('/h2h')
+def h2h():
+    """Head-to-head record of p1 against p2 (optionally on a surface), O(1) from the exported index."""
+    if h2h_index is None:
+        return jsonify({'error': 'head-to-head index not found on server'}), 500
+
+    p1, p2, surface = request.args.get('p1'), request.args.get('p2'), request.args.get('surface')
+    if not p1 or not p2:
+        return jsonify({'error': 'query must contain "p1" and "p2"'}), 400
+
+    record = {'p1': p1, 'p2': p2, 'matches': 0, 'p1_wins': 0, 'p2_wins': 0, 'last_meeting': None}
+    a, b = h2h_index['player_ids'].get(p1), h2h_index['player_ids'].get(p2)
+    if a is not None and b is not None and a != b:
+        key = (a, b) if a < b else (b, a)
+        a_slot = 0 if a < b else 1
+        pair = h2h_index['pairs'].get(key)
+        if pair is not None:
+            record.update(matches=pair[0] + pair[1], p1_wins=pair[a_slot], p2_wins=pair[1 - a_slot],
+                          last_meeting=str(np.datetime64(pair[2], 'D')))
+        if surface:
+            cell = h2h_index['surface_pairs'].get(key + (surface,), [0, 0])
+            record.update(surface=surface, surface_p1_wins=cell[a_slot], surface_p2_wins=cell[1 - a_slot])
+    return jsonify(record)
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     if model is None:
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """
+    Sorted view of a frame's match dates, built once.
+
+    positions(start, end) returns the row positions with start <= Date < end
+    as a slice of the precomputed order (a view, no copy) found with two
+    binary searches.
+    """
+
+    def __init__(self, dates):
+        values = np.asarray(dates, dtype='datetime64[ns]')
+        if len(values) < 2 or (values[1:] >= values[:-1]).all():
+            # Processed frames are already chronological
+            self.order = np.arange(len(values))
+            self.sorted = values
+        else:
+            self.order = np.argsort(values, kind='stable')
+            self.sorted = values[self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def bounds(self, start=None, end=None):
+        """Positions [lo, hi) in the sorted order of start <= Date < end."""
+        lo = 0 if start is None else int(np.searchsorted(self.sorted, np.datetime64(pd.Timestamp(start), 'ns')))
+        hi = len(self.sorted) if end is None else int(np.searchsorted(self.sorted, np.datetime64(pd.Timestamp(end), 'ns')))
+        return lo, hi
+
+    def positions(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        return self.order[lo:hi]
+
+
+class WalkForwardSplit:
+    """
+    Walk-forward (time series) cross-validation over match dates.
+
+    One test window per period of freq from first_test up to last_test, e.g.
+    first_test='2015-01-01', last_test='2024-01-01', freq='YS' gives ten
+    yearly folds. Each fold trains on everything before its test window
+    (expanding origin) or, with window=n, on the n periods just before it
+    (rolling origin). gap periods between train and test are left out.
+
+    Yields (train_idx, test_idx) positional index arrays (use with .iloc or
+    numpy indexing). They are views into one precomputed DateIndex, so a
+    backtest over many folds copies neither the frame nor the index.
+    Follows the scikit-learn splitter protocol (split / get_n_splits).
+    """
+
+    def __init__(self, dates, first_test, last_test, freq='YS', window=None, gap=0):
+        self.index = dates if isinstance(dates, DateIndex) else DateIndex(dates)
+        self.freq = pd.tseries.frequencies.to_offset(freq)
+        self.window = window
+        self.gap = gap
+
+        # (train_start, test_start, test_end) per fold; train_start None = expanding
+        self.folds = []
+        for origin in pd.date_range(first_test, last_test, freq=self.freq):
+            train_end = origin - self.freq * gap if gap else origin
+            train_start = train_end - self.freq * window if window else None
+            self.folds.append((train_start, train_end, origin, origin + self.freq))
+
+    def __len__(self):
+        return len(self.folds)
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return len(self.folds)
+
+    def split(self, X=None, y=None, groups=None):
+        for train_start, train_end, test_start, test_end in self.folds:
+            yield self.index.positions(train_start, train_end), self.index.positions(test_start, test_end)
+
+    def __iter__(self):
+        return self.split()
+
+    def describe(self):
+        """One row per fold: date bounds and sizes."""
+        rows = []
+        for fold, (train_start, train_end, test_start, test_end) in enumerate(self.folds):
+            train_lo, train_hi = self.index.bounds(train_start, train_end)
+            test_lo, test_hi = self.index.bounds(test_start, test_end)
+            rows.append({
+                'fold': fold,
+                'train_start': train_start,
+                'train_end': train_end,
+                'test_start': test_start,
+                'test_end': test_end,
+                'n_train': train_hi - train_lo,
+                'n_test': test_hi - test_lo,
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+def make_matches(n_matches=2000, n_players=60, seed=0):
+    """
+    Synthetic ATP-like match table with the same columns as atp_tennis.csv.
+    Used by the tests and by the benchmarks when the real CSV is not available.
+    """
+    rng = np.random.default_rng(seed)
+    players = np.array([f"Player {i}." for i in range(n_players)])
+    p1 = rng.integers(0, n_players, n_matches)
+    p2 = (p1 + rng.integers(1, n_players, n_matches)) % n_players
+    p1_wins = rng.random(n_matches) < 0.5
+
+    dates = pd.Timestamp('2010-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 365 * 5, n_matches)), unit='D')
+    surfaces = rng.choice(['Hard', 'Clay', 'Grass', 'Carpet'], n_matches, p=[0.5, 0.3, 0.15, 0.05])
+
+    games_w = rng.choice([6, 7], (n_matches, 3))
+    games_l = rng.integers(0, 5, (n_matches, 3))
+    scores = [f"{a}-{b} {c}-{d}" for a, b, c, d in zip(games_w[:, 0], games_l[:, 0], games_w[:, 1], games_l[:, 1])]
+
+    return pd.DataFrame({
+        'Tournament': rng.choice(['Open A', 'Open B', 'Masters C'], n_matches),
+        'Date': dates,
+        'Series': rng.choice(['ATP250', 'ATP500', 'Masters 1000', 'Grand Slam'], n_matches),
+        'Court': rng.choice(['Outdoor', 'Indoor'], n_matches),
+        'Surface': surfaces,
+        'Round': rng.choice(['1st Round', '2nd Round', 'Quarterfinals', 'The Final'], n_matches),
+        'Best of': rng.choice([3, 5], n_matches),
+        'Player_1': players[p1],
+        'Player_2': players[p2],
+        'Winner': np.where(p1_wins, players[p1], players[p2]),
+        'Rank_1': rng.integers(1, 300, n_matches).astype(float),
+        'Rank_2': rng.integers(1, 300, n_matches).astype(float),
+        'Pts_1': rng.integers(0, 10000, n_matches).astype(float),
+        'Pts_2': rng.integers(0, 10000, n_matches).astype(float),
+        'Odd_1': rng.uniform(1.01, 5, n_matches).round(2),
+        'Odd_2': rng.uniform(1.01, 5, n_matches).round(2),
+        'Score': scores,
+    })
@@ -0,0 +1,8 @@
+import pytest
+
+from src.synthetic import make_matches
+
+
+@pytest.fixture
+def matches():
+    return make_matches()
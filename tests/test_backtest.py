@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from src.backtest import run_backtest
+from src.modeling import CATEGORICAL_COLS, NUMERICAL_COLS, build_preprocessor
+from src.preprocessing import TennisPreprocessor
+
+
+def test_parallel_backtest_matches_sequential_pipelines(matches, tmp_path):
+    processor = TennisPreprocessor()
+    processor.raw_df = matches
+    processor.process()
+    df = processor.df
+    splitter = processor.walk_forward_split('2012-01-01', '2014-01-01', window=2)
+    models = {
+        'LogisticRegression_v2': LogisticRegression(max_iter=1000),
+        'DecisionTree_v2': DecisionTreeClassifier(random_state=0, max_depth=5),
+    }
+
+    metrics, predictions, report = run_backtest(df, splitter, models, out_dir=tmp_path, n_jobs=2)
+
+    assert len(metrics) == 3 * len(models)
+    assert report['n_folds'] == 3 and set(report['summary']) == set(models)
+    assert json.loads((tmp_path / 'report.json').read_text())['n_folds'] == 3
+
+    # Same predictions as the string-column pipeline of train_v2 fitted fold by fold
+    features = NUMERICAL_COLS + CATEGORICAL_COLS
+    for fold, (train_idx, test_idx) in enumerate(splitter.split()):
+        for name, model in models.items():
+            clf = Pipeline([('preprocessor', build_preprocessor()), ('classifier', model)])
+            clf.fit(df[features].iloc[train_idx], df['y'].iloc[train_idx])
+            expected = clf.predict_proba(df[features].iloc[test_idx])[:, 1]
+
+            got = predictions[(predictions['fold'] == fold) & (predictions['model'] == name)]
+            np.testing.assert_array_equal(got['row'].to_numpy(), test_idx)
+            np.testing.assert_allclose(got['proba'].to_numpy(), expected, rtol=1e-10, atol=1e-12)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_io import read_matches
+from src.preprocessing import TennisPreprocessor
+
+
+def test_typed_loader_schema_and_pipeline(matches, tmp_path):
+    path = tmp_path / 'atp_tennis.csv'
+    matches.to_csv(path, index=False)
+
+    df = read_matches(path)
+    assert isinstance(df['Surface'].dtype, pd.CategoricalDtype)
+    assert df['Player_1'].dtype == df['Winner'].dtype  # shared player categories
+    assert df['Odd_1'].dtype == np.float32
+    assert df['Date'].dtype.kind == 'M'
+
+    pruned = read_matches(path, usecols=['Player_1', 'Player_2', 'Winner', 'Surface'])
+    assert list(pruned.columns) == ['Date', 'Surface', 'Player_1', 'Player_2', 'Winner']
+
+    # The typed path feeds the same Elo features as the plain read_csv path
+    plain = TennisPreprocessor()
+    plain.load_data(path)
+    plain.process()
+    typed = TennisPreprocessor()
+    typed.load_data(path, typed=True)
+    typed.process()
+    np.testing.assert_array_equal(typed.df['elo_p1'].to_numpy(), plain.df['elo_p1'].to_numpy())
+    np.testing.assert_array_equal(typed.df['y'].to_numpy(), plain.df['y'].to_numpy())
+
+
+def test_clean_data_cache_hit_and_invalidation(matches, tmp_path):
+    path = tmp_path / 'atp_tennis.csv'
+    cache_dir = tmp_path / 'cache'
+    matches.to_csv(path, index=False)
+
+    miss = TennisPreprocessor()
+    fresh = miss.load_clean_data(path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob('*.parquet'))) == 1
+    assert miss.raw_df is None  # a miss leaves the same clean state as a hit
+
+    hit = TennisPreprocessor()
+    cached = hit.load_clean_data(path, cache_dir=cache_dir)
+    assert hit.raw_df is None and hit.n_source_rows == len(matches)
+    pd.testing.assert_frame_equal(cached, fresh.reset_index(drop=True))
+
+    # process() runs on the cached frame without re-cleaning
+    hit.process()
+    assert 'elo_p1' in hit.df.columns
+
+    # Appending a row changes the content hash: new entry, stale one removed
+    matches.iloc[:1].to_csv(path, mode='a', header=False, index=False)
+    TennisPreprocessor().load_clean_data(path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob('*.parquet'))) == 1
+    assert len(list(cache_dir.glob('*.json'))) == 1
+
+
+def test_feature_table_artifact_reuse_and_invalidation(matches, tmp_path, monkeypatch):
+    path = tmp_path / 'atp_tennis.csv'
+    artifacts = tmp_path / 'features'
+    matches.to_csv(path, index=False)
+
+    cleans = []
+    clean_data = TennisPreprocessor.clean_data
+    monkeypatch.setattr(TennisPreprocessor, 'clean_data', lambda self: cleans.append(1) or clean_data(self))
+
+    first = TennisPreprocessor()
+    built = first.load_processed(path, artifact_dir=artifacts, cache_dir=tmp_path / 'cache')
+    assert len(cleans) == 1  # an artifact miss cleans once, process() does not clean again
+
+    reused = TennisPreprocessor()
+    loaded = reused.load_processed(path, artifact_dir=artifacts, cache_dir=tmp_path / 'cache')
+    assert reused.raw_df is None  # nothing was re-read or replayed
+    pd.testing.assert_frame_equal(loaded, built.reset_index(drop=True))
+    assert reused.elo_system.ratings == first.elo_system.ratings
+    assert reused.rating_history.as_of(built['Player_1'].iloc[0], '2100-01-01') == \
+        first.rating_history.as_of(built['Player_1'].iloc[0], '2100-01-01')
+    p1, p2 = built['Player_1'].iloc[-1], built['Player_2'].iloc[-1]
+    assert reused.h2h.lookup(p1, p2) == first.h2h.lookup(p1, p2)
+    np.testing.assert_array_equal(reused.form_state.recent, first.form_state.recent)
+
+    # Different feature parameters -> different artifact key
+    other = TennisPreprocessor(k_factor=32)
+    assert other.feature_params() != first.feature_params()
+    rebuilt = other.load_processed(path, artifact_dir=artifacts, cache_dir=tmp_path / 'cache')
+    assert not np.array_equal(rebuilt['elo_p1'].to_numpy(), built['elo_p1'].to_numpy())
+
+
+def test_process_stream_equals_process(matches, tmp_path):
+    path = tmp_path / 'atp_tennis.csv'
+    matches.to_csv(path, index=False)
+
+    full = TennisPreprocessor(decay_half_lives=(30,))
+    full.load_data(path)
+    full.process()
+
+    streamed = TennisPreprocessor(decay_half_lives=(30,))
+    rows = streamed.process_stream(path, tmp_path / 'features.parquet', chunk_size=700)
+    assert rows == len(matches)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'features.parquet'), full.df, check_dtype=False)
+    assert streamed.elo_system.ratings == full.elo_system.ratings
+
+    # Chunks must arrive in date order
+    matches.iloc[::-1].to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        TennisPreprocessor().process_stream(path, tmp_path / 'reversed.parquet', chunk_size=700)
+
+
+def test_lean_mode_dtypes_and_values(matches):
+    default = TennisPreprocessor()
+    default.raw_df = matches.copy()
+    default.process()
+
+    lean = TennisPreprocessor(lean=True)
+    lean.raw_df = matches.copy()
+    lean.process()
+
+    df = lean.df
+    assert lean.raw_df is None  # clean_data took ownership of the raw frame
+    assert isinstance(df['Player_1'].dtype, pd.CategoricalDtype)
+    assert df['Player_1'].dtype == df['Winner'].dtype
+    assert df['y'].dtype == np.int8
+    assert df['elo_p1'].dtype == np.float32 and df['p1_win_rate_last_10'].dtype == np.float32
+    assert df.memory_usage(deep=True).sum() < default.df.memory_usage(deep=True).sum() / 2
+
+    for col in ['elo_p1', 'elo_prob_p1', 'p2_win_rate_surface', 'h2h_win_rate_p1', 'p1_matches_last_30d']:
+        np.testing.assert_allclose(df[col].to_numpy(np.float64), default.df[col].to_numpy(), rtol=1e-6)
+    np.testing.assert_array_equal(df['y'], default.df['y'])
+
+
+def test_lean_and_default_use_separate_cache_entries(matches, tmp_path):
+    csv_path = tmp_path / 'atp_tennis.csv'
+    matches.to_csv(csv_path, index=False)
+    cache_dir = tmp_path / 'cache'
+
+    TennisPreprocessor(lean=True).load_clean_data(csv_path, cache_dir=cache_dir)
+    df = TennisPreprocessor().load_clean_data(csv_path, cache_dir=cache_dir)
+
+    assert not isinstance(df['Player_1'].dtype, pd.CategoricalDtype)
+    assert df['Odd_1'].dtype == np.float64
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from src.features import HeadToHead
+from src.preprocessing import TennisPreprocessor
+
+ELO_COLS = ['elo_p1', 'elo_p2', 'elo_prob_p1', 'elo_prob_p2', 'elo_surf_p1', 'elo_surf_p2']
+FORM_COLS = [f'{side}_win_rate_{name}' for side in ('p1', 'p2') for name in ('career', 'last_10', 'surface')]
+
+
+def _processor(df):
+    processor = TennisPreprocessor()
+    processor.raw_df = df
+    processor.clean_data()
+    return processor
+
+
+def test_array_engine_matches_iterrows_bit_for_bit(matches):
+    reference = _processor(matches)
+    reference.add_elo_features(engine='iterrows')
+
+    fast = _processor(matches)
+    fast.add_elo_features(engine='array')
+
+    for col in ELO_COLS:
+        np.testing.assert_array_equal(fast.df[col].to_numpy(), reference.df[col].to_numpy())
+
+    # Final state is written back into the EloSystem dicts
+    assert fast.elo_system.ratings == reference.elo_system.ratings
+    assert fast.elo_system.surface_ratings == reference.elo_system.surface_ratings
+
+
+def test_missing_player_does_not_alias_a_registered_player(matches):
+    matches['Player_2'] = matches['Player_2'].astype(object)
+    matches.loc[5, 'Player_2'] = np.nan
+
+    # Resumed state for the last registered player (what ID -1 used to wrap around to)
+    last = sorted(set(matches['Player_1']))[-1]
+    reference = _processor(matches)
+    reference.elo_system.ratings[last] = 1700.0
+    reference.add_elo_features(engine='iterrows')
+
+    fast = _processor(matches)
+    fast.intern_players()
+    assert fast.df['p2_id'].iloc[5] == -1 and fast.players.names[-1] == last
+    fast.elo_system.ratings[last] = 1700.0
+    fast.add_elo_features(engine='array')
+
+    for col in ELO_COLS:
+        np.testing.assert_array_equal(fast.df[col].to_numpy(), reference.df[col].to_numpy())
+    assert None not in fast.elo_system.ratings
+    named = {p: r for p, r in reference.elo_system.ratings.items() if isinstance(p, str)}
+    assert fast.elo_system.ratings == named
+
+def test_parallel_surfaces_match_sequential(matches):
+    sequential = _processor(matches)
+    sequential.add_elo_features()
+
+    parallel = _processor(matches)
+    parallel.add_elo_features(n_jobs=4)
+
+    for col in ELO_COLS:
+        np.testing.assert_array_equal(parallel.df[col].to_numpy(), sequential.df[col].to_numpy())
+    assert parallel.elo_system.surface_ratings == sequential.elo_system.surface_ratings
+
+
+def test_ingest_new_matches_equals_full_replay(matches, tmp_path):
+    # Strictly increasing dates so the chronological order is unambiguous
+    matches['Date'] = pd.Timestamp('2015-01-01') + pd.to_timedelta(range(len(matches)), unit='h')
+    csv_path = tmp_path / 'atp_tennis.csv'
+    checkpoint_path = tmp_path / 'elo_checkpoint.json'
+
+    full = TennisPreprocessor(decay_half_lives=(30,))
+    full.raw_df = matches.copy()
+    full.process()
+
+    # Checkpoint after the first 1500 matches, then append the rest
+    matches.iloc[:1500].to_csv(csv_path, index=False)
+    history = TennisPreprocessor(decay_half_lives=(30,))
+    history.load_data(csv_path)
+    history.process()
+    history.save_checkpoint(checkpoint_path)
+
+    matches.iloc[1500:].to_csv(csv_path, mode='a', header=False, index=False)
+    new_rows = TennisPreprocessor().ingest_new_matches(csv_path, checkpoint_path)
+
+    assert len(new_rows) == len(matches) - 1500
+    decay_cols = [c for c in full.df.columns if 'decay' in c]
+    assert len(decay_cols) == 8
+    schedule_cols = [f'{side}_{name}' for side in ('p1', 'p2')
+                     for name in ('matches_last_7d', 'matches_last_30d', 'days_since_last_match', 'tournament_matches')]
+    for col in ELO_COLS + FORM_COLS + HeadToHead.FEATURES + decay_cols + schedule_cols:
+        np.testing.assert_array_equal(new_rows[col].to_numpy(), full.df[col].to_numpy()[1500:])
+
+    # Checkpoint advanced: a second ingestion finds nothing new
+    assert TennisPreprocessor().ingest_new_matches(csv_path, checkpoint_path).empty
+
+
+def test_rating_history_as_of_lookups(matches):
+    processor = _processor(matches)
+    processor.add_elo_features()
+    history = processor.rating_history
+    df = processor.df
+
+    # The rating going into a player's first match on a new day equals its pre-match Elo
+    player = df['Player_1'].iloc[-1]
+    rows = df[(df['Player_1'] == player) | (df['Player_2'] == player)]
+    first_of_day = rows[~rows['Date'].duplicated()]
+    expected = np.where(first_of_day['Player_1'] == player, first_of_day['elo_p1'], first_of_day['elo_p2'])
+    got = history.as_of_batch([player] * len(first_of_day), first_of_day['Date'].to_numpy())
+    np.testing.assert_array_equal(got, expected)
+
+    surf_rows = rows[rows['Surface'] == 'Clay']
+    surf_rows = surf_rows[~surf_rows['Date'].duplicated()]
+    expected_surf = np.where(surf_rows['Player_1'] == player, surf_rows['elo_surf_p1'], surf_rows['elo_surf_p2'])
+    got_surf = history.as_of_batch([player] * len(surf_rows), surf_rows['Date'].to_numpy(), surface='Clay')
+    np.testing.assert_array_equal(got_surf, expected_surf)
+
+    # After the last match: the final rating; before the first: the initial rating
+    assert history.as_of(player, '2100-01-01') == processor.elo_system.ratings[player]
+    assert history.as_of(player, '1990-01-01') == 1500
+    assert history.as_of('Unknown X.', '2015-01-01') == 1500
+    assert len(history.player_history(player)) == len(rows)
+
+
+def test_sweep_matches_single_replay(matches):
+    processor = _processor(matches)
+    results = processor.sweep_elo_params(k_factors=[10, 20, 40], surface_weights=[0.0, 0.5])
+    assert len(results) == 6
+
+    # The (K=20, w=0) column reproduces the regular elo_prob_p1 column
+    processor.add_elo_features()
+    p = np.clip(processor.df['elo_prob_p1'].to_numpy(), 1e-15, 1 - 1e-15)
+    y = (processor.df['Winner'] == processor.df['Player_1']).to_numpy()
+    expected = -np.mean(np.where(y, np.log(p), np.log(1 - p)))
+
+    row = results[(results['k_factor'] == 20) & (results['surface_weight'] == 0.0)].iloc[0]
+    assert abs(row['log_loss'] - expected) < 1e-9
+
+
+def test_sweep_initial_rating_does_not_change_scores(matches):
+    processor = _processor(matches)
+    results = processor.sweep_elo_params(k_factors=[20], initial_ratings=[1000, 1500, 2000])
+
+    for metric in ('log_loss', 'brier', 'accuracy'):
+        np.testing.assert_allclose(results[metric], results[metric].iloc[0], rtol=1e-9)
+
+
+def test_multitrack_engine_matches_global_and_surface_tracks(matches):
+    reference = _processor(matches)
+    reference.add_elo_features()
+
+    multi = _processor(matches)
+    tracks = [('elo', None), ('elo_surf', 'Surface'), ('elo_court', 'Court'), ('elo_series', ['Series', 'Surface'])]
+    multi.add_elo_features(engine='multitrack', tracks=tracks)
+
+    for col in ELO_COLS:
+        np.testing.assert_allclose(multi.df[col].to_numpy(), reference.df[col].to_numpy(), rtol=1e-12)
+    assert {'elo_court_p1', 'elo_court_p2', 'elo_series_p1', 'elo_series_p2'} <= set(multi.df.columns)
+
+    for player, rating in reference.elo_system.ratings.items():
+        assert abs(multi.elo_system.ratings[player] - rating) < 1e-9
+
+
+def test_multitrack_engine_resumes_from_elo_state(matches):
+    full = _processor(matches)
+    full.add_elo_features(engine='multitrack')
+
+    chunked = _processor(matches)
+    cleaned = chunked.df
+    parts = []
+    for part in (cleaned.iloc[:1000], cleaned.iloc[1000:]):
+        chunked.df = part.copy()
+        chunked.add_elo_features(engine='multitrack', history=False)
+        parts.append(chunked.df)
+
+    for col in ELO_COLS:
+        np.testing.assert_allclose(pd.concat(parts)[col].to_numpy(), full.df[col].to_numpy(), rtol=1e-12)
+    assert chunked.elo_system.surface_ratings == full.elo_system.surface_ratings
+
+def test_period_engine_is_leakage_safe(matches):
+    processor = _processor(matches)
+    processor.add_elo_features(engine='period', period='W')
+    df = processor.df
+
+    # Flipping every result of the last week must not change that week's features
+    weeks = df['Date'].dt.to_period('W')
+    last_week = (weeks == weeks.iloc[-1]).to_numpy()
+    flipped = matches.copy()
+    loser = np.where(flipped['Winner'] == flipped['Player_1'], flipped['Player_2'], flipped['Player_1'])
+    flipped['Winner'] = np.where(last_week, loser, flipped['Winner'])
+    other = _processor(flipped)
+    other.add_elo_features(engine='period', period='W')
+    for col in ELO_COLS:
+        np.testing.assert_array_equal(other.df[col].to_numpy(), df[col].to_numpy())
+
+    # With one match per period it reduces to the sequential engine
+    one_per_day = matches.copy()
+    one_per_day['Date'] = pd.Timestamp('2000-01-01') + pd.to_timedelta(range(len(matches)), unit='D')
+    sequential = _processor(one_per_day)
+    sequential.add_elo_features()
+    daily = _processor(one_per_day)
+    daily.add_elo_features(engine='period', period='D')
+    for col in ELO_COLS:
+        np.testing.assert_allclose(daily.df[col].to_numpy(), sequential.df[col].to_numpy(), rtol=1e-12)
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+
+import src.features
+from src.features import (FormState, HeadToHead, grouped_exclusive_cumcount, grouped_exclusive_cumsum,
+                          parse_score_column)
+from src.players import PlayerIndex
+from src.preprocessing import TennisPreprocessor
+
+FORM_COLS = [f'{side}_win_rate_{name}' for side in ('p1', 'p2') for name in ('career', 'last_10', 'surface')]
+
+
+def _processor(df, **kwargs):
+    processor = TennisPreprocessor(**kwargs)
+    processor.raw_df = df
+    processor.clean_data()
+    return processor
+
+
+def test_incremental_form_matches_batch(matches):
+    batch = _processor(matches)
+    batch.add_features()
+
+    head = _processor(matches.iloc[:1200])
+    head.add_features()
+    tail = _processor(matches.iloc[1200:].reset_index(drop=True))
+    tail.form_state = head.form_state
+    tail.add_features(incremental=True)
+
+    for col in FORM_COLS:
+        np.testing.assert_array_equal(tail.df[col].to_numpy(), batch.df[col].to_numpy()[1200:])
+
+
+def test_grouped_exclusive_kernels_match_groupby():
+    rng = np.random.default_rng(0)
+    codes = np.sort(rng.integers(0, 50, 1000))
+    values = rng.integers(0, 2, 1000)
+    grouped = pd.Series(values).groupby(codes)
+
+    np.testing.assert_array_equal(grouped_exclusive_cumcount(codes), grouped.cumcount())
+    np.testing.assert_array_equal(grouped_exclusive_cumsum(values, codes), grouped.cumsum() - values)
+    # First row of every group sees nothing
+    first = np.r_[True, codes[1:] != codes[:-1]]
+    assert not grouped_exclusive_cumsum(values, codes)[first].any()
+
+
+def test_p1_p2_win_rates_are_per_player(matches):
+    processor = _processor(matches)
+    processor.add_features()
+    df = processor.df
+
+    for name in ('career', 'surface'):
+        assert not np.array_equal(df[f'p1_win_rate_{name}'], df[f'p2_win_rate_{name}'])
+
+    # Career win rate equals the player's results strictly before the match
+    player = df['Player_1'].iloc[-1]
+    before = df.iloc[:-1]
+    played = (before['Player_1'] == player) | (before['Player_2'] == player)
+    expected = (before.loc[played, 'Winner'] == player).mean()
+    assert df['p1_win_rate_career'].iloc[-1] == expected
+
+
+def test_career_and_surface_rates_do_not_leak_across_groups(matches):
+    # A shift(1) over the whole long frame would hand each player's first match
+    # the previous player's running total; replay the matches one by one instead
+    processor = _processor(matches)
+    processor.add_features()
+    df = processor.df
+
+    wins, played = {}, {}
+    expected = {col: [] for col in ('p1_win_rate_career', 'p2_win_rate_career',
+                                    'p1_win_rate_surface', 'p2_win_rate_surface')}
+    for p1, p2, winner, surface in df[['Player_1', 'Player_2', 'Winner', 'Surface']].itertuples(index=False):
+        for side, player in (('p1', p1), ('p2', p2)):
+            for name, key in (('career', player), ('surface', (player, surface))):
+                n = played.get(key, 0)
+                expected[f'{side}_win_rate_{name}'].append(wins.get(key, 0) / n if n else 0.0)
+        for player in (p1, p2):
+            for key in (player, (player, surface)):
+                played[key] = played.get(key, 0) + 1
+                wins[key] = wins.get(key, 0) + (winner == player)
+
+    for col, values in expected.items():
+        np.testing.assert_allclose(df[col].to_numpy(float), values, rtol=0, atol=1e-12, err_msg=col)
+
+
+def test_form_windows_match_rolling_reference(matches):
+    processor = _processor(matches, form_windows=(3, 10, 25))
+    processor.add_features()
+    df = processor.df.reset_index(drop=True)
+
+    long_df = processor._long_form(df)
+    for keys, name in ((['Player'], 'win_rate_last'), (['Player', 'Surface'], 'win_rate_surface_last')):
+        for w in (3, 10, 25):
+            expected = long_df.groupby(keys)['Won'].transform(
+                lambda x: x.shift(1).rolling(w, min_periods=1).mean()).fillna(0)
+            np.testing.assert_allclose(long_df[f'{name}_{w}'], expected)
+
+    assert 'p2_win_rate_surface_last_25' in df.columns
+
+
+def test_incremental_form_windows_match_batch(matches):
+    batch = _processor(matches, form_windows=(3, 20))
+    batch.add_features()
+
+    head = _processor(matches.iloc[:1200], form_windows=(3, 20))
+    head.add_features()
+    tail = _processor(matches.iloc[1200:].reset_index(drop=True), form_windows=(3, 20))
+    tail.form_state = head.form_state
+    tail.add_features(incremental=True)
+
+    for col in tail.form_state.feature_names():
+        for side in ('p1', 'p2'):
+            np.testing.assert_array_equal(tail.df[f'{side}_{col}'].to_numpy(),
+                                          batch.df[f'{side}_{col}'].to_numpy()[1200:])
+
+
+def test_form_state_from_history_equals_sequential_updates(matches):
+    # Both key their rows on one PlayerIndex, so the arrays line up row for row
+    players = PlayerIndex()
+    vectorized = FormState.from_history(matches, window=10, players=players)
+    sequential = FormState(window=10, players=players)
+    sequential.update(matches)
+
+    np.testing.assert_array_equal(vectorized.matches, sequential.matches)
+    np.testing.assert_array_equal(vectorized.wins, sequential.wins)
+    np.testing.assert_array_equal(vectorized.recent, sequential.recent)
+
+
+def test_player_summary_matches_per_player_recount(matches):
+    summary = FormState.from_history(matches, window=10).player_summary()
+
+    for player in ['Player 0.', 'Player 7.', 'Player 42.']:
+        played = matches[(matches['Player_1'] == player) | (matches['Player_2'] == player)]
+        won = (played['Winner'] == player).astype(int)
+        assert summary[player]['win_rate_career'] == won.mean()
+        assert summary[player]['win_rate_last_10'] == won.tail(10).mean()
+        assert summary[player]['win_rate_surfaces'] == won.groupby(played['Surface']).mean().to_dict()
+
+
+def test_parse_score_column(monkeypatch):
+    scores = pd.Series(['7-6(5) 6-0 ret.', 'W/O', None, '6-4 3-6 6-7(2) 7-6(4) 70-68'])
+    parsed = parse_score_column(scores)
+
+    assert parsed['sets_played'].tolist() == [2, 0, 0, 5]
+    assert parsed['p1_sets'].tolist() == [2, 0, 0, 3]
+    assert parsed['p2_games'].tolist() == [6, 0, 0, 91]
+    assert parsed['tiebreaks'].tolist() == [1, 0, 0, 2]
+    assert parsed['p1_bagels'].tolist() == [1, 0, 0, 0]
+    assert parsed['retired'].tolist() == [1, 0, 0, 0]
+    assert parsed['walkover'].tolist() == [0, 1, 0, 0]
+
+    monkeypatch.setattr(src.features, 'HAS_PYARROW', False)
+    pd.testing.assert_frame_equal(parse_score_column(scores), parsed)
+
+
+def test_features_scattered_to_their_matches(matches):
+    processor = _processor(matches)
+    processor.add_features()
+    df = processor.df
+
+    # A player's career win rate before their second match is the first match's result
+    first = df.iloc[0]
+    later = df.iloc[1:]
+    player = first['Player_1']
+    nxt = later[(later['Player_1'] == player) | (later['Player_2'] == player)].iloc[0]
+    side = 'p1' if nxt['Player_1'] == player else 'p2'
+    assert nxt[f'{side}_win_rate_career'] == float(first['Winner'] == player)
+    assert df['p1_win_rate_career'].iloc[0] == 0.0
+
+
+def test_decayed_form_matches_direct_sum(matches):
+    processor = _processor(matches, decay_half_lives=(30,))
+    processor.add_elo_features()
+    processor.add_decay_features()
+    df = processor.df
+
+    # Decayed win rate of the last match's P1: weights 0.5 ** (age / half-life) over earlier matches
+    player, date = df['Player_1'].iloc[-1], df['Date'].iloc[-1]
+    before = df.iloc[:-1]
+    played = before[(before['Player_1'] == player) | (before['Player_2'] == player)]
+    weights = 0.5 ** ((date - played['Date']).dt.days.to_numpy() / 30)
+    won = (played['Winner'] == player).to_numpy()
+
+    assert np.isclose(df['p1_win_rate_decay_30'].iloc[-1], (weights * won).sum() / weights.sum())
+    assert np.isclose(df['p1_matches_decay_30'].iloc[-1], weights.sum())
+    assert df['p1_win_rate_elo_decay_30'].between(0, 1).all()
+    assert df['p2_win_rate_surface_decay_30'].between(0, 1).all()
+
+
+def test_h2h_features_and_lookup(matches):
+    processor = _processor(matches)
+    processor.add_h2h_features()
+    df = processor.df
+
+    row = df.iloc[-1]
+    a, b = row['Player_1'], row['Player_2']
+    before = df.iloc[:-1]
+    met = before[((before['Player_1'] == a) & (before['Player_2'] == b)) |
+                 ((before['Player_1'] == b) & (before['Player_2'] == a))]
+    on_surface = met[met['Surface'] == row['Surface']]
+
+    assert row['h2h_matches'] == len(met)
+    assert row['h2h_p1_wins'] == (met['Winner'] == a).sum()
+    assert row['h2h_surface_p1_wins'] == (on_surface['Winner'] == a).sum()
+    assert df['h2h_win_rate_p1'].iloc[0] == 0.5 and np.isnan(df['h2h_days_since_last'].iloc[0])
+
+    # The index includes the last match and reads the same from both sides
+    record = processor.h2h.lookup(a, b, surface=row['Surface'])
+    assert record['matches'] == len(met) + 1
+    reverse = processor.h2h.lookup(b, a)
+    assert (reverse['wins'], reverse['losses']) == (record['losses'], record['wins'])
+    assert HeadToHead().lookup(a, b)['matches'] == 0
+
+
+def test_schedule_features_match_per_row_filters(matches):
+    processor = _processor(matches)
+    processor.add_schedule_features()
+    df = processor.df
+
+    for i in (len(df) // 2, len(df) - 1):
+        row = df.iloc[i]
+        player = row['Player_2']
+        before = df.iloc[:i]
+        played = before[(before['Player_1'] == player) | (before['Player_2'] == player)]
+        age = (row['Date'] - played['Date']).dt.days
+        for w in (7, 14, 30):
+            assert row[f'p2_matches_last_{w}d'] == (age < w).sum()
+        assert row['p2_days_since_last_match'] == age.min()
+        assert row['p2_tournament_matches'] == ((played['Tournament'] == row['Tournament']) & (age < 21)).sum()
+
+    assert np.isnan(df['p1_days_since_last_match'].iloc[0])
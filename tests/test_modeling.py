@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+from joblib import load
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from src.modeling import (CATEGORICAL_COLS, NUMERICAL_COLS, build_preprocessor, fit_concurrently, peak_rss_mb,
+                          thread_budgets)
+from src.preprocessing import TennisPreprocessor
+
+
+def test_thread_budgets_share_spare_cores():
+    models = {
+        'lr': LogisticRegression(),
+        'dt': DecisionTreeClassifier(),
+        'rf': RandomForestClassifier(),
+        'rf2': RandomForestClassifier(),
+    }
+    assert thread_budgets(models, n_cores=8) == {'lr': 1, 'dt': 1, 'rf': 3, 'rf2': 3}
+    assert thread_budgets(models, n_cores=7) == {'lr': 1, 'dt': 1, 'rf': 3, 'rf2': 2}
+    # Never below one thread, even on a small machine
+    assert thread_budgets(models, n_cores=2) == {'lr': 1, 'dt': 1, 'rf': 1, 'rf2': 1}
+
+
+def test_concurrent_fits_equal_sequential_fits(matches, tmp_path):
+    processor = TennisPreprocessor()
+    processor.raw_df = matches
+    processor.process()
+    train_df, test_df = processor.time_based_split('2014-01-01')
+    features = NUMERICAL_COLS + CATEGORICAL_COLS
+    X_train, y_train, X_test, y_test = train_df[features], train_df['y'], test_df[features], test_df['y']
+
+    def pipelines():
+        return {
+            'lr': Pipeline([('preprocessor', build_preprocessor()), ('classifier', LogisticRegression(max_iter=1000))]),
+            'rf': Pipeline([('preprocessor', build_preprocessor()),
+                            ('classifier', RandomForestClassifier(n_estimators=20, random_state=0))]),
+        }
+
+    paths = {name: str(tmp_path / f'{name}.pkl') for name in ['lr', 'rf']}
+    # A large parent peak must not show up in the workers' own peaks
+    ballast = np.ones(80_000_000)  # 640 MB
+    assert peak_rss_mb() > 640
+    usage = fit_concurrently(pipelines(), X_train, y_train, X_test, y_test, paths, n_cores=2)
+    del ballast
+
+    for name, expected in pipelines().items():
+        expected.fit(X_train, y_train)
+        np.testing.assert_array_equal(load(paths[name]).predict_proba(X_test), expected.predict_proba(X_test))
+        assert usage[name]['test_acc'] == expected.score(X_test, y_test)
+        assert usage[name]['wall_seconds'] > 0 and 0 < usage[name]['peak_rss_mb'] < 500
+        json.dumps(usage[name])
+
+
+def test_shared_design_matrix_bundles_one_fitted_preprocessor(matches, tmp_path):
+    processor = TennisPreprocessor()
+    processor.raw_df = matches
+    processor.process()
+    train_df, test_df = processor.time_based_split('2014-01-01')
+    features = NUMERICAL_COLS + CATEGORICAL_COLS
+    X_train, y_train, X_test, y_test = train_df[features], train_df['y'], test_df[features], test_df['y']
+
+    def pipelines():
+        return {
+            'lr': Pipeline([('preprocessor', build_preprocessor()), ('classifier', LogisticRegression(max_iter=1000))]),
+            'dt': Pipeline([('preprocessor', build_preprocessor()),
+                            ('classifier', DecisionTreeClassifier(max_depth=8, random_state=0))]),
+        }
+
+    paths = {name: str(tmp_path / f'{name}.pkl') for name in ['lr', 'dt']}
+    usage = fit_concurrently(pipelines(), X_train, y_train, X_test, y_test, paths, n_cores=2,
+                             shared_design=True, design_dir=tmp_path / 'design')
+
+    design = np.load(tmp_path / 'design' / 'train.npy', mmap_mode='r')
+    assert design.dtype == np.float32 and design.shape[0] == len(X_train)
+
+    exported = {name: load(path) for name, path in paths.items()}
+    # One preprocessor fit, bundled into every artifact
+    np.testing.assert_array_equal(exported['lr'].named_steps['preprocessor'].transform(X_test),
+                                  exported['dt'].named_steps['preprocessor'].transform(X_test))
+
+    # Serving from raw frames matches per-model pipelines (trees train on float32 anyway)
+    for name, expected in pipelines().items():
+        expected.fit(X_train, y_train)
+        proba = exported[name].predict_proba(X_test)
+        if name == 'dt':
+            np.testing.assert_array_equal(proba, expected.predict_proba(X_test))
+            assert usage[name]['test_acc'] == expected.score(X_test, y_test)
+        else:
+            # float32 inputs: lbfgs converges to the same optimum within tolerance
+            np.testing.assert_allclose(proba, expected.predict_proba(X_test), atol=1e-3)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.players import PlayerIndex
+from src.preprocessing import TennisPreprocessor
+
+
+def test_ids_are_stable_and_aliases_resolve(tmp_path):
+    index = PlayerIndex().add(['Nadal R.', 'Federer R.'])
+    assert index.names == ['Federer R.', 'Nadal R.']
+
+    index.add_alias('Nadal Rafael', 'Nadal R.')
+    index.add(['Alcaraz C.', 'Nadal Rafael'])
+    # New players are appended; existing IDs never move
+    assert index.names == ['Federer R.', 'Nadal R.', 'Alcaraz C.']
+
+    codes = index.encode(pd.Series(['Nadal Rafael', 'Alcaraz C.', 'Unknown', None]))
+    assert codes.dtype == np.int32
+    assert codes.tolist() == [1, 2, -1, -1]
+    assert index.decode(codes[:2]).tolist() == ['Nadal R.', 'Alcaraz C.']
+
+    index.save(tmp_path / 'players.json')
+    restored = PlayerIndex.load(tmp_path / 'players.json')
+    assert restored.names == index.names
+    assert restored.id('Nadal Rafael') == 1
+
+
+def test_interned_ids_persist_across_ingestion(matches, tmp_path):
+    matches['Date'] = pd.Timestamp('2015-01-01') + pd.to_timedelta(range(len(matches)), unit='h')
+    csv_path = tmp_path / 'atp_tennis.csv'
+    checkpoint_path = tmp_path / 'elo_checkpoint.json'
+
+    matches.iloc[:1500].to_csv(csv_path, index=False)
+    history = TennisPreprocessor()
+    history.load_data(csv_path)
+    history.process()
+    history.save_checkpoint(checkpoint_path)
+    known = list(history.players.names)
+
+    matches.iloc[1500:].to_csv(csv_path, mode='a', header=False, index=False)
+    processor = TennisPreprocessor()
+    new_rows = processor.ingest_new_matches(csv_path, checkpoint_path)
+
+    assert processor.players.names[:len(known)] == known
+    for side in ('1', '2'):
+        decoded = processor.players.decode(new_rows[f'p{side}_id'].to_numpy())
+        assert decoded.tolist() == new_rows[f'Player_{side}'].astype(str).tolist()
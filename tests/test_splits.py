@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from src.preprocessing import TennisPreprocessor
+from src.splits import DateIndex, WalkForwardSplit
+
+
+def _dates():
+    # Unsorted on purpose: the splitter must not rely on the frame order
+    rng = np.random.default_rng(0)
+    return pd.Series(pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 15 * 365, 5000), unit='D'))
+
+
+def test_expanding_folds_match_date_masks():
+    dates = _dates()
+    splitter = WalkForwardSplit(dates, '2015-01-01', '2024-01-01')
+    assert len(splitter) == 10
+
+    for (train_idx, test_idx), year in zip(splitter.split(), range(2015, 2025)):
+        origin = pd.Timestamp(f'{year}-01-01')
+        expected_test = np.flatnonzero((dates >= origin) & (dates < origin + pd.DateOffset(years=1)))
+        np.testing.assert_array_equal(np.sort(test_idx), expected_test)
+        np.testing.assert_array_equal(np.sort(train_idx), np.flatnonzero(dates < origin))
+
+
+def test_rolling_folds_with_gap():
+    dates = _dates()
+    splitter = WalkForwardSplit(dates, '2016-01-01', '2018-01-01', window=3, gap=1)
+    for (train_idx, test_idx), year in zip(splitter, range(2016, 2019)):
+        train_dates = dates.iloc[train_idx]
+        assert train_dates.min() >= pd.Timestamp(f'{year - 4}-01-01')
+        assert train_dates.max() < pd.Timestamp(f'{year - 1}-01-01')
+        assert len(train_idx) == ((dates >= f'{year - 4}-01-01') & (dates < f'{year - 1}-01-01')).sum()
+
+    sizes = splitter.describe()
+    assert sizes['n_test'].sum() == ((dates >= '2016-01-01') & (dates < '2019-01-01')).sum()
+
+
+def test_sorted_frame_folds_are_views(matches):
+    processor = TennisPreprocessor()
+    processor.raw_df = matches
+    processor.clean_data()
+
+    splitter = processor.walk_forward_split('2012-01-01', '2014-01-01')
+    index = processor._date_index[1]
+    assert isinstance(index, DateIndex)
+    for train_idx, test_idx in splitter:
+        assert np.shares_memory(train_idx, index.order) and np.shares_memory(test_idx, index.order)
+        assert (processor.df['Date'].iloc[test_idx] >= processor.df['Date'].iloc[train_idx].max()).all()
+
+    # The date index is reused until the frame changes
+    assert processor.walk_forward_split('2013-01-01', '2014-01-01').index is index